@@ -0,0 +1,50 @@
+"""Add_Step_Attempts
+
+Revision ID: 5e2a8f0c6b91
+Revises: 9b1e4c7a2d53
+Create Date: 2026-10-19 12:04:51.207318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2a8f0c6b91'
+down_revision: Union[str, Sequence[str], None] = '9b1e4c7a2d53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'step_attempts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('attempt_uuid', sa.String(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('module_id', sa.Integer(), nullable=True),
+        sa.Column('step_id', sa.Integer(), nullable=True),
+        sa.Column('step_index', sa.Integer(), nullable=True),
+        sa.Column('value', sa.Text(), nullable=True),
+        sa.Column('passed', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['module_id'], ['modules.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('attempt_uuid')
+    )
+    with op.batch_alter_table('step_attempts', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_step_attempts_id'), ['id'], unique=False)
+        batch_op.create_index('ix_step_attempts_user_module', ['user_id', 'module_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('step_attempts', schema=None) as batch_op:
+        batch_op.drop_index('ix_step_attempts_user_module')
+        batch_op.drop_index(batch_op.f('ix_step_attempts_id'))
+
+    op.drop_table('step_attempts')
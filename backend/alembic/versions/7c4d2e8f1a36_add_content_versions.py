@@ -0,0 +1,36 @@
+"""Add_Content_Versions
+
+Revision ID: 7c4d2e8f1a36
+Revises: d3f7a1b9c204
+Create Date: 2026-10-19 13:21:40.118263
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c4d2e8f1a36'
+down_revision: Union[str, Sequence[str], None] = 'd3f7a1b9c204'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('modules', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('learning_resources', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('learning_resources', schema=None) as batch_op:
+        batch_op.drop_column('version')
+
+    with op.batch_alter_table('modules', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,99 @@
+"""Normalize_Quiz_Questions
+
+Revision ID: 9b1e4c7a2d53
+Revises: cc05b50996fe
+Create Date: 2026-10-19 11:26:08.731554
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1e4c7a2d53'
+down_revision: Union[str, Sequence[str], None] = 'cc05b50996fe'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    quiz_questions = op.create_table(
+        'quiz_questions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('module_id', sa.Integer(), nullable=True),
+        sa.Column('order_index', sa.Integer(), nullable=True),
+        sa.Column('type', sa.String(), nullable=True),
+        sa.Column('question', sa.Text(), nullable=True),
+        sa.Column('options', sa.JSON(), nullable=True),
+        sa.Column('correct_answer', sa.Text(), nullable=True),
+        sa.Column('tolerance', sa.Float(), nullable=True),
+        sa.Column('explanation', sa.Text(), nullable=True),
+        sa.Column('module_index', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['module_id'], ['modules.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('quiz_questions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_quiz_questions_id'), ['id'], unique=False)
+        batch_op.create_index('ix_quiz_questions_module_order', ['module_id', 'order_index'], unique=False)
+
+    # Move the JSON blobs into rows
+    conn = op.get_bind()
+    rows = []
+    for module_id, quiz_data in conn.execute(sa.text("SELECT id, quiz_data FROM modules WHERE quiz_data IS NOT NULL")):
+        try:
+            parsed = json.loads(quiz_data)
+        except ValueError:
+            continue
+        if isinstance(parsed, dict):
+            parsed = parsed.get('questions', [])
+        for i, q in enumerate(q for q in parsed if isinstance(q, dict) and q.get('correct_answer') is not None):
+            options = q.get('options')
+            rows.append({
+                'module_id': module_id,
+                'order_index': i,
+                'type': q.get('type') or ('mcq' if options else 'fill'),
+                'question': q.get('question', ''),
+                'options': [str(o) for o in options] if options else None,
+                'correct_answer': str(q['correct_answer']),
+                'tolerance': q.get('tolerance'),
+                'explanation': q.get('explanation'),
+                'module_index': q.get('module_index'),
+            })
+    if rows:
+        op.bulk_insert(quiz_questions, rows)
+
+    with op.batch_alter_table('modules', schema=None) as batch_op:
+        batch_op.drop_column('quiz_data')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('modules', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('quiz_data', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    quizzes = {}
+    for row in conn.execute(sa.text(
+        "SELECT module_id, type, question, options, correct_answer, tolerance, explanation, module_index "
+        "FROM quiz_questions ORDER BY module_id, order_index"
+    )).mappings():
+        q = dict(row)
+        module_id = q.pop('module_id')
+        if isinstance(q['options'], str):
+            q['options'] = json.loads(q['options'])
+        quizzes.setdefault(module_id, []).append({k: v for k, v in q.items() if v is not None})
+    for module_id, questions in quizzes.items():
+        conn.execute(
+            sa.text("UPDATE modules SET quiz_data = :quiz_data WHERE id = :id"),
+            {"quiz_data": json.dumps(questions), "id": module_id},
+        )
+
+    with op.batch_alter_table('quiz_questions', schema=None) as batch_op:
+        batch_op.drop_index('ix_quiz_questions_module_order')
+        batch_op.drop_index(batch_op.f('ix_quiz_questions_id'))
+
+    op.drop_table('quiz_questions')
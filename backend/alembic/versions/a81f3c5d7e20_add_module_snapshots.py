@@ -0,0 +1,43 @@
+"""Add_Module_Snapshots
+
+Revision ID: a81f3c5d7e20
+Revises: 7c4d2e8f1a36
+Create Date: 2026-10-19 15:02:17.405913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a81f3c5d7e20'
+down_revision: Union[str, Sequence[str], None] = '7c4d2e8f1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing modules stay unpublished (served live) until POST /modules/{id}/publish
+    with op.batch_alter_table('modules', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('published_version', sa.Integer(), nullable=True))
+
+    op.create_table('module_snapshots',
+    sa.Column('module_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('body', sa.LargeBinary(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.ForeignKeyConstraint(['module_id'], ['modules.id'], ),
+    sa.PrimaryKeyConstraint('module_id', 'version')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('module_snapshots')
+
+    with op.batch_alter_table('modules', schema=None) as batch_op:
+        batch_op.drop_column('published_version')
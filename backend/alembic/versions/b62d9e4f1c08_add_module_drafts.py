@@ -0,0 +1,34 @@
+"""Add_Module_Drafts
+
+Revision ID: b62d9e4f1c08
+Revises: e5b9d2c4f817
+Create Date: 2026-10-19 18:21:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b62d9e4f1c08'
+down_revision: Union[str, Sequence[str], None] = 'e5b9d2c4f817'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('module_drafts',
+    sa.Column('module_id', sa.Integer(), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['module_id'], ['modules.id'], ),
+    sa.PrimaryKeyConstraint('module_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('module_drafts')
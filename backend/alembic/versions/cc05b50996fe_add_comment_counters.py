@@ -0,0 +1,49 @@
+"""Add_Comment_Counters
+
+Revision ID: cc05b50996fe
+Revises: f70a7df8f1c1
+Create Date: 2026-10-19 10:03:17.402913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cc05b50996fe'
+down_revision: Union[str, Sequence[str], None] = 'f70a7df8f1c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('modules', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('reply_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill counters from existing comments
+    op.execute(
+        """
+        UPDATE modules SET
+            comment_count = (SELECT COUNT(*) FROM comments WHERE comments.module_id = modules.id),
+            reply_count = (SELECT COUNT(*) FROM comments WHERE comments.module_id = modules.id AND comments.parent_id IS NOT NULL)
+        """
+    )
+
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index('ix_comments_module_parent')
+        batch_op.create_index('ix_comments_module_parent_created', ['module_id', 'parent_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index('ix_comments_module_parent_created')
+        batch_op.create_index('ix_comments_module_parent', ['module_id', 'parent_id'], unique=False)
+
+    with op.batch_alter_table('modules', schema=None) as batch_op:
+        batch_op.drop_column('reply_count')
+        batch_op.drop_column('comment_count')
@@ -0,0 +1,74 @@
+"""Add_Training_Rollups
+
+Revision ID: d3f7a1b9c204
+Revises: 5e2a8f0c6b91
+Create Date: 2026-10-19 12:48:13.559820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f7a1b9c204'
+down_revision: Union[str, Sequence[str], None] = '5e2a8f0c6b91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _stat_columns():
+    return [
+        sa.Column('assigned', sa.Integer(), nullable=False),
+        sa.Column('not_started', sa.Integer(), nullable=False),
+        sa.Column('in_progress', sa.Integer(), nullable=False),
+        sa.Column('completed', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.Column('score_sum', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite can't ADD COLUMN with a CURRENT_TIMESTAMP default; the model sets it on every write
+    with op.batch_alter_table('user_progress', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE user_progress SET updated_at = CURRENT_TIMESTAMP")
+    with op.batch_alter_table('user_progress', schema=None) as batch_op:
+        batch_op.create_index('ix_user_progress_updated_at', ['updated_at'], unique=False)
+
+    op.create_table(
+        'module_role_stats',
+        sa.Column('module_id', sa.Integer(), nullable=False),
+        sa.Column('role_id', sa.Integer(), nullable=False),
+        *_stat_columns(),
+        sa.ForeignKeyConstraint(['module_id'], ['modules.id'], ),
+        sa.PrimaryKeyConstraint('module_id', 'role_id')
+    )
+    op.create_table(
+        'user_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        *_stat_columns(),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    # No watermark row yet: the first refresh does a full build
+    op.create_table(
+        'rollup_state',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('watermark', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rollup_state')
+    op.drop_table('user_stats')
+    op.drop_table('module_role_stats')
+
+    with op.batch_alter_table('user_progress', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_progress_updated_at')
+        batch_op.drop_column('updated_at')
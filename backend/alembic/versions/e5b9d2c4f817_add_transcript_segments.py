@@ -0,0 +1,42 @@
+"""Add_Transcript_Segments
+
+Revision ID: e5b9d2c4f817
+Revises: a81f3c5d7e20
+Create Date: 2026-10-19 16:48:03.551274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9d2c4f817'
+down_revision: Union[str, Sequence[str], None] = 'a81f3c5d7e20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('transcript_segments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('module_id', sa.Integer(), nullable=False),
+    sa.Column('step_id', sa.Integer(), nullable=True),
+    sa.Column('start_time', sa.Float(), nullable=False),
+    sa.Column('end_time', sa.Float(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['module_id'], ['modules.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('transcript_segments', schema=None) as batch_op:
+        batch_op.create_index('ix_transcript_segments_module_start', ['module_id', 'start_time'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('transcript_segments', schema=None) as batch_op:
+        batch_op.drop_index('ix_transcript_segments_module_start')
+
+    op.drop_table('transcript_segments')
@@ -0,0 +1,74 @@
+"""Add_Hot_Path_Indexes
+
+Revision ID: f70a7df8f1c1
+Revises: 4d70e84ea23a
+Create Date: 2026-10-19 09:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f70a7df8f1c1'
+down_revision: Union[str, Sequence[str], None] = '4d70e84ea23a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Collapse duplicate progress rows per (user, module) before enforcing
+    # uniqueness. The survivor is the row with the quiz outcome (Completed, then
+    # Failed, best score first), so a finished module isn't reset; it takes the
+    # furthest step any of its duplicates reached.
+    op.execute(
+        """
+        UPDATE user_progress SET current_step_index = (
+            SELECT MAX(p.current_step_index) FROM user_progress p
+            WHERE p.user_id = user_progress.user_id AND p.module_id = user_progress.module_id
+        )
+        WHERE (user_id, module_id) IN (
+            SELECT user_id, module_id FROM user_progress
+            GROUP BY user_id, module_id HAVING COUNT(*) > 1
+        )
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM user_progress WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY user_id, module_id
+                    ORDER BY CASE status WHEN 'Completed' THEN 0 WHEN 'Failed' THEN 1 ELSE 2 END,
+                             score DESC, current_step_index DESC, id
+                ) AS rn
+                FROM user_progress
+            ) ranked
+            WHERE ranked.rn > 1
+        )
+        """
+    )
+
+    with op.batch_alter_table('user_progress', schema=None) as batch_op:
+        batch_op.create_index('uq_user_progress_user_module', ['user_id', 'module_id'], unique=True)
+
+    with op.batch_alter_table('module_steps', schema=None) as batch_op:
+        batch_op.create_index('ix_module_steps_module_order', ['module_id', 'order_index'], unique=False)
+
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.create_index('ix_comments_module_parent', ['module_id', 'parent_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.drop_index('ix_comments_module_parent')
+
+    with op.batch_alter_table('module_steps', schema=None) as batch_op:
+        batch_op.drop_index('ix_module_steps_module_order')
+
+    with op.batch_alter_table('user_progress', schema=None) as batch_op:
+        batch_op.drop_index('uq_user_progress_user_module')
@@ -0,0 +1,246 @@
+"""
+Training analytics rollups.
+
+module_role_stats (module x role) and user_stats (per user) hold status counts
+and score sums derived from user_progress. They are maintained incrementally.
+Each refresh reads only the progress rows whose updated_at is past the stored
+watermark. From those it collects the dirty (module, role) pairs and users, and
+recomputes just those keys with a grouped query. Dashboard reads are therefore
+O(modules x roles) no matter how many employees there are.
+
+The watermark is rewound by WATERMARK_OVERLAP seconds on every run, so a
+transaction that commits late with an older updated_at is still picked up.
+Recomputing a key is idempotent, so the overlap is harmless.
+
+Changes that don't touch user_progress aren't seen: a user moving to another
+role, or rows deleted outside delete_module. Use refresh(full=True), also
+exposed as POST /admin/analytics/refresh?full=true, after such changes.
+"""
+import asyncio
+import os
+from datetime import timedelta
+
+from sqlalchemy import case, delete, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from . import models
+from .crud import dialect_insert
+from .database import SessionLocal
+from .pagination import PageParams, keyset, make_page
+
+REFRESH_INTERVAL = float(os.getenv("ANALYTICS_REFRESH_INTERVAL", "30"))
+WATERMARK_OVERLAP = timedelta(seconds=int(os.getenv("ANALYTICS_WATERMARK_OVERLAP", "10")))
+_KEY_CHUNK = 500
+_STATE = "user_progress"
+
+_STAT_COLUMNS = ("assigned", "not_started", "in_progress", "completed", "failed", "score_sum")
+
+
+def _stat_aggregates():
+    p = models.UserProgress
+    graded = p.status.in_(("Completed", "Failed"))
+    return [
+        func.count(p.id).label("assigned"),
+        func.sum(case((p.status == "Not Started", 1), else_=0)).label("not_started"),
+        func.sum(case((p.status == "In Progress", 1), else_=0)).label("in_progress"),
+        func.sum(case((p.status == "Completed", 1), else_=0)).label("completed"),
+        func.sum(case((p.status == "Failed", 1), else_=0)).label("failed"),
+        func.coalesce(func.sum(case((graded, p.score), else_=0.0)), 0.0).label("score_sum"),
+    ]
+
+
+def _role_key():
+    return func.coalesce(models.User.role_id, 0)
+
+
+def _chunks(items):
+    items = list(items)
+    for i in range(0, len(items), _KEY_CHUNK):
+        yield items[i:i + _KEY_CHUNK]
+
+
+def _upsert(db: Session, table, keys, rows):
+    if not rows:
+        return
+    stmt = dialect_insert(db)(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={**{c: stmt.excluded[c] for c in _STAT_COLUMNS}, "updated_at": func.now()},
+    )
+    db.execute(stmt)
+
+
+def _recompute_module_roles(db: Session, pairs):
+    p, u = models.UserProgress, models.User
+    for chunk in _chunks(pairs):
+        rows = db.execute(
+            select(p.module_id, _role_key().label("role_id"), *_stat_aggregates())
+            .join(u, u.id == p.user_id)
+            .where(tuple_(p.module_id, _role_key()).in_(chunk))
+            .group_by(p.module_id, _role_key())
+        ).mappings().all()
+        _upsert(db, models.ModuleRoleStats, ["module_id", "role_id"], [dict(r) for r in rows])
+        # Keys with no progress left (e.g. every learner unassigned)
+        empty = set(chunk) - {(r["module_id"], r["role_id"]) for r in rows}
+        if empty:
+            db.execute(delete(models.ModuleRoleStats).where(
+                tuple_(models.ModuleRoleStats.module_id, models.ModuleRoleStats.role_id).in_(empty)
+            ))
+
+
+def _recompute_users(db: Session, user_ids):
+    p = models.UserProgress
+    for chunk in _chunks(user_ids):
+        rows = db.execute(
+            select(p.user_id, *_stat_aggregates()).where(p.user_id.in_(chunk)).group_by(p.user_id)
+        ).mappings().all()
+        _upsert(db, models.UserStats, ["user_id"], [dict(r) for r in rows])
+        empty = set(chunk) - {r["user_id"] for r in rows}
+        if empty:
+            db.execute(delete(models.UserStats).where(models.UserStats.user_id.in_(empty)))
+
+
+def refresh(db: Session, full: bool = False) -> dict:
+    """Fold progress changes since the watermark into the rollups; returns what was touched."""
+    p, u = models.UserProgress, models.User
+    state = db.get(models.RollupState, _STATE)
+    if state is None:
+        state = models.RollupState(name=_STATE)
+        db.add(state)
+    started_at = db.execute(select(func.now())).scalar()
+
+    if full or state.watermark is None:
+        db.execute(delete(models.ModuleRoleStats))
+        db.execute(delete(models.UserStats))
+        dirty = select(p.user_id, p.module_id, _role_key().label("role_id")).join(u, u.id == p.user_id)
+    else:
+        dirty = select(p.user_id, p.module_id, _role_key().label("role_id")).join(
+            u, u.id == p.user_id
+        ).where(p.updated_at > state.watermark - WATERMARK_OVERLAP)
+
+    user_ids, pairs = set(), set()
+    for user_id, module_id, role_id in db.execute(dirty.distinct()):
+        user_ids.add(user_id)
+        pairs.add((module_id, role_id))
+
+    _recompute_module_roles(db, pairs)
+    _recompute_users(db, user_ids)
+    state.watermark = started_at
+    db.commit()
+    return {"full": full, "module_roles": len(pairs), "users": len(user_ids), "watermark": started_at}
+
+
+def forget_module(db: Session, module_id: int, user_ids):
+    """
+    Called by delete_module after the module's progress rows are gone; the
+    caller commits. Its module_role_stats rows go with the module in
+    crud.module_cascade, ahead of the modules row they reference.
+    """
+    _recompute_users(db, user_ids)
+
+
+# --- Reads ---
+def _with_rates(row) -> dict:
+    row = dict(row)
+    graded = row["completed"] + row["failed"]
+    row["completion_rate"] = round(100.0 * row["completed"] / row["assigned"], 1) if row["assigned"] else 0.0
+    row["avg_score"] = round(row.pop("score_sum") / graded, 1) if graded else None
+    return row
+
+
+def module_stats_query(role_id=None):
+    """Per-module totals, optionally for a single role."""
+    s = models.ModuleRoleStats
+    stmt = select(
+        s.module_id,
+        models.Module.title,
+        *[func.sum(getattr(s, c)).label(c) for c in _STAT_COLUMNS],
+    ).join(models.Module, models.Module.id == s.module_id).group_by(s.module_id, models.Module.title)
+    if role_id is not None:
+        stmt = stmt.where(s.role_id == role_id)
+    return stmt.order_by(s.module_id)
+
+
+def get_module_stats(db: Session, role_id=None):
+    return [_with_rates(r) for r in db.execute(module_stats_query(role_id)).mappings()]
+
+
+def get_module_role_stats(db: Session, module_id: int):
+    s = models.ModuleRoleStats
+    rows = db.execute(
+        select(s.module_id, s.role_id, *[getattr(s, c) for c in _STAT_COLUMNS])
+        .where(s.module_id == module_id)
+        .order_by(s.role_id)
+    ).mappings()
+    return [_with_rates(r) for r in rows]
+
+
+def user_stats_query(page: PageParams):
+    s = models.UserStats
+    stmt = select(
+        s.user_id, models.User.employee_code, *[getattr(s, c) for c in _STAT_COLUMNS]
+    ).join(models.User, models.User.id == s.user_id)
+    return keyset(stmt, [s.user_id], page)
+
+
+def get_user_stats(db: Session, page: PageParams):
+    rows = db.execute(user_stats_query(page)).mappings().all()
+    result = make_page(rows, page, lambda r: [r["user_id"]])
+    result["items"] = [_with_rates(r) for r in result["items"]]
+    return result
+
+
+# --- Periodic job ---
+def refresh_now(full: bool = False) -> dict:
+    db = SessionLocal()
+    try:
+        return refresh(db, full=full)
+    finally:
+        db.close()
+
+
+class RollupJob:
+    def __init__(self, interval: float = REFRESH_INTERVAL):
+        self.interval = interval
+        self._task = None
+        self._lock = None
+        self.runs = 0
+        self.errors = 0
+        self.last_result = None
+
+    async def run_once(self, full: bool = False) -> dict:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            result = await asyncio.to_thread(refresh_now, full)
+        self.runs += 1
+        self.last_result = result
+        return result
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Analytics refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"interval": self.interval, "runs": self.runs, "errors": self.errors, "last_result": self.last_result}
+
+
+rollup_job = RollupJob()
@@ -1,17 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, models, schemas
-from ..database import get_db
+from typing import List, Optional
+import codecs
+import csv
+import json
+from .. import crud, crud_async, http_cache, models, schemas, serialization
+from ..database import async_engine, engine, get_async_db, get_db, get_pool_status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from ..auth import SECRET_KEY, ALGORITHM
+from ..auth import SECRET_KEY, ALGORITHM, hashing_stats
+from ..pagination import PageParams, page_params
+from ..principal_cache import principal_cache
+from ..attempt_log import attempt_log
+from ..scheduler import scheduler
+from .. import analytics, search, storage
 
 router = APIRouter()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -24,73 +33,224 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = crud.get_user_by_code(db, employee_code=employee_code)
+    principal = await principal_cache.get(employee_code)
+    if principal is not None:
+        return principal
+    user = await crud_async.get_user_by_code(db, employee_code=employee_code)
     if user is None:
         raise credentials_exception
-    return user
+    principal = schemas.UserMe.model_validate(user)
+    await principal_cache.set(employee_code, principal)
+    return principal
 
 # --- Auth & User Management ---
 
 @router.post("/auth/register")
-def register(user_data: schemas.UserRegister, db: Session = Depends(get_db)):
-    user = crud.get_user_by_code(db, employee_code=user_data.employee_code)
+async def register(user_data: schemas.UserRegister, db: AsyncSession = Depends(get_async_db)):
+    user = await crud_async.get_user_by_code(db, employee_code=user_data.employee_code)
     if not user:
         raise HTTPException(status_code=400, detail="User not recognized (Ask Admin to whitelist)")
     if user.is_registered:
         raise HTTPException(status_code=400, detail="User already registered")
     
-    crud.register_user(db, user, user_data.password)
+    await crud_async.register_user(db, user, user_data.password)
+    await principal_cache.invalidate_user(user.employee_code)
     return {"message": "Registration successful"}
 
 @router.post("/auth/login", response_model=schemas.Token)
-def login(user_data: schemas.UserLogin, db: Session = Depends(get_db)):
-    from ..auth import verify_password, create_access_token
-    user = crud.get_user_by_code(db, employee_code=user_data.employee_code)
+async def login(user_data: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    from ..auth import verify_password_async, create_access_token
+    user = await crud_async.get_user_by_code(db, employee_code=user_data.employee_code)
     if not user or not user.hashed_password:
         raise HTTPException(status_code=400, detail="Invalid credentials")
-    if not verify_password(user_data.password, user.hashed_password):
+    valid, new_hash = await verify_password_async(user_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid credentials")
+    if new_hash:
+        # Stored hash is below the configured cost; upgrade it transparently
+        user.hashed_password = new_hash
+        await db.commit()
     
     access_token = create_access_token(data={"sub": user.employee_code})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/auth/me", response_model=schemas.UserMe)
-def read_users_me(current_user: models.User = Depends(get_current_user)):
-    return current_user
+async def read_users_me(current_user: schemas.UserMe = Depends(get_current_user)):
+    return serialization.json_response(serialization.user_me_adapter, current_user)
+
+@router.get("/dashboard", response_model=schemas.Page[schemas.AssignmentSummary])
+async def read_dashboard(page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    return await crud_async.get_dashboard(db, current_user.id, page)
 
 # --- Admin: User Management ---
 
 @router.post("/assignments", response_model=schemas.UserProgress)
-def assign_module(request: schemas.AssignModuleRequest, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def assign_module(request: schemas.AssignModuleRequest, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
     # TODO: Check if current_user is Admin
     if current_user.role_id != 1:
         raise HTTPException(status_code=403, detail="Not authorized")
     
     return crud.assign_module_to_user(db, request.user_id, request.module_id)
 
+@router.post("/assignments/bulk", response_model=schemas.BulkAssignResult)
+def bulk_assign_modules(request: schemas.BulkAssignRequest, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if not request.module_ids or not (request.user_ids or request.role_ids):
+        raise HTTPException(status_code=400, detail="Provide module_ids and at least one of user_ids or role_ids")
+    
+    return crud.bulk_assign_modules(db, request.module_ids, request.user_ids, request.role_ids)
+
 # --- Admin: User Management ---
 
 @router.post("/users", response_model=schemas.User)
-def create_user_whitelist(user: schemas.UserCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def create_user_whitelist(user: schemas.UserCreate, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
     # TODO: Check if current_user is Admin
     existing = crud.get_user_by_code(db, user.employee_code)
     if existing:
         raise HTTPException(status_code=400, detail="User already exists")
     return crud.create_user(db, user)
 
-@router.get("/users", response_model=List[schemas.User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+IMPORT_CHUNK_SIZE = 64 * 1024
+
+def _iter_upload_lines(fileobj):
+    # Decode the spooled upload chunk by chunk; splitting on "\n" alone keeps
+    # "\r\n" endings whole, which the csv module needs for quoted newlines
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    while True:
+        chunk = fileobj.read(IMPORT_CHUNK_SIZE)
+        pending += decoder.decode(chunk, final=not chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+        if not chunk:
+            break
+    if pending:
+        yield pending
+
+def _iter_import_rows(upload: UploadFile):
+    """Yield (row_number, dict) from a CSV or NDJSON upload without reading it all into memory."""
+    filename = (upload.filename or "").lower()
+    is_ndjson = filename.endswith((".ndjson", ".jsonl")) or "ndjson" in (upload.content_type or "")
+    lines = _iter_upload_lines(upload.file)
+    if is_ndjson:
+        for row_no, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield row_no, json.loads(line)
+            except ValueError:
+                yield row_no, None
+    else:
+        # Row 1 is the header
+        for row_no, record in enumerate(csv.DictReader(lines), start=2):
+            yield row_no, record
+
+@router.post("/users/import", response_model=schemas.UserImportResult)
+def import_users(file: UploadFile = File(...), db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return crud.bulk_import_users(db, _iter_import_rows(file))
+
+@router.get("/users", response_model=schemas.Page[schemas.User])
+def read_users(page: PageParams = Depends(page_params), db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
     # TODO: Check if current_user is Admin
-    users = crud.get_users(db, skip=skip, limit=limit)
-    return users
+    return crud.get_users(db, page)
+
+# --- Admin: Diagnostics ---
+
+@router.get("/admin/db/pool")
+def read_pool_status(current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return {"sync": get_pool_status(engine), "async": get_pool_status(async_engine.sync_engine)}
+
+@router.get("/admin/cache/principals")
+def read_principal_cache_stats(current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return principal_cache.stats()
+
+@router.post("/admin/cache/principals/clear")
+async def clear_principal_cache(current_user: schemas.UserMe = Depends(get_current_user)):
+    # After editing users or roles outside the API (seed scripts, SQL)
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return {"cleared": await principal_cache.clear()}
+
+@router.get("/admin/auth/hashing")
+def read_hashing_stats(current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return hashing_stats()
+
+@router.get("/admin/attempts/buffer")
+def read_attempt_buffer_stats(current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return attempt_log.stats()
+
+@router.get("/admin/attempts", response_model=schemas.Page[schemas.StepAttempt])
+def read_attempts(user_id: Optional[int] = None, module_id: Optional[int] = None, page: PageParams = Depends(page_params), db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    # Audit trail of submitted answers (flushed attempts only)
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return crud.get_attempts(db, page, user_id=user_id, module_id=module_id)
+
+# --- Training Analytics (rollups, see analytics.py) ---
+
+@router.get("/admin/analytics/modules", response_model=List[schemas.ModuleStats])
+def read_module_analytics(role_id: Optional[int] = None, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return analytics.get_module_stats(db, role_id=role_id)
+
+@router.get("/admin/analytics/modules/{module_id}/roles", response_model=List[schemas.ModuleStats])
+def read_module_role_analytics(module_id: int, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return analytics.get_module_role_stats(db, module_id)
+
+@router.get("/admin/analytics/users", response_model=schemas.Page[schemas.UserStats])
+def read_user_analytics(page: PageParams = Depends(page_params), db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return analytics.get_user_stats(db, page)
+
+@router.post("/admin/analytics/refresh", response_model=schemas.AnalyticsRefreshResult)
+async def refresh_analytics(full: bool = False, current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return await analytics.rollup_job.run_once(full=full)
+
+@router.get("/admin/analytics/job")
+def read_analytics_job(current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return analytics.rollup_job.stats()
+
+@router.get("/admin/pipeline/scheduler")
+def read_pipeline_scheduler(current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return scheduler.stats()
 
 # --- Modules & Learning ---
 
+# The vector index (and numpy) is imported on first use rather than at API startup
+def _refresh_module_vectors(module_id: int):
+    from ..services import embeddings
+    embeddings.refresh_module(module_id)
+
+def _refresh_resource_vectors(resource_id: int):
+    from ..services import embeddings
+    embeddings.refresh_resource(resource_id)
+
 from fastapi import BackgroundTasks
-from .tasks import process_video_task
 
 @router.post("/modules", response_model=schemas.Module)
-def create_module(module: schemas.ModuleCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def create_module(module: schemas.ModuleCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
     # TODO: Check permissions
     
     # Create module in DB first
@@ -105,61 +265,142 @@ def create_module(module: schemas.ModuleCreate, background_tasks: BackgroundTask
             
             # Set processing flag
             db_module.is_processing = True
+            crud.bump_module_version(db, db_module.id)
             db.commit()
             
-            # Add to background tasks
-            background_tasks.add_task(process_video_task, db_module.id, video_path, module.description)
+            # Queue for the pipeline workers; the pipeline (moviepy, groq, PIL) is only imported once it's needed
+            from .tasks import process_video_task
+            scheduler.submit(
+                process_video_task, db_module.id, video_path, module.description,
+                priority=module.priority, owner=current_user.id, label=f"module {db_module.id}",
+            )
         except Exception as e:
             print(f"Error triggering background task: {e}")
+    
+    # Hand-authored modules go out straight away; generated ones once the pipeline finishes
+    if not db_module.is_processing:
+        crud.publish_module(db, db_module.id)
+        db.commit()
+        background_tasks.add_task(_refresh_module_vectors, db_module.id)
             
-    return db_module
+    return crud.get_module_with_steps(db, db_module.id)
 
-@router.get("/modules", response_model=List[schemas.Module])
-def read_modules(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.get_all_modules(db)
+@router.get("/modules", response_model=schemas.Page[schemas.ModuleSummary])
+async def read_modules(page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    return await crud_async.get_module_summaries(db, page)
 
 @router.get("/modules/{module_id}", response_model=schemas.Module)
-def read_module(module_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    module = crud.get_module(db, module_id)
+async def read_module(module_id: int, request: Request, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    # Learner view: the published snapshot is one indexed blob fetch, sent still gzipped
+    snapshot = await crud_async.get_published_snapshot(db, module_id)
+    if snapshot:
+        etag = http_cache.snapshot_etag(module_id, snapshot.version)
+        if http_cache.not_modified(request, etag):
+            return http_cache.not_modified_response(etag)
+        response = serialization.gzipped_json_response(request, snapshot.body)
+        http_cache.set_etag(response, etag)
+        return response
+    # Never published: build it live
+    return await _live_module_response(module_id, request, db)
+
+@router.get("/modules/{module_id}/draft", response_model=schemas.ModuleDraft)
+def read_module_draft(module_id: int, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    # Pending, unpublished edits (or the live module) for the edit page
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    draft = crud.get_module_draft(db, module_id)
+    if not draft:
+        raise HTTPException(status_code=404, detail="Module not found")
+    return draft
+
+async def _live_module_response(module_id: int, request: Request, db: AsyncSession):
+    # Revalidation is a single-row version lookup; steps are only loaded on a miss
+    current = await crud_async.get_module_version(db, module_id)
+    if not current:
+        raise HTTPException(status_code=404, detail="Module not found")
+    etag = http_cache.module_etag(current)
+    if http_cache.not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+
+    module = await crud_async.get_module_with_steps(db, module_id)
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
-    return module
+    response = serialization.json_response(serialization.module_adapter, module)
+    http_cache.set_etag(response, http_cache.module_etag(module))
+    return response
+
+@router.post("/modules/{module_id}/publish", response_model=schemas.ModulePublished)
+def publish_module(module_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if db.query(models.Module.is_processing).filter(models.Module.id == module_id).scalar():
+        raise HTTPException(status_code=409, detail="Module is still processing")
+    snapshot = crud.publish_module(db, module_id)
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Module not found")
+    db.commit()
+    background_tasks.add_task(_refresh_module_vectors, module_id)
+    return {"module_id": module_id, "version": snapshot.version, "size": snapshot.size, "compressed_size": len(snapshot.body)}
+
+@router.get("/modules/{module_id}/transcript", response_model=List[schemas.TranscriptSegment])
+async def read_transcript(module_id: int, start: Optional[float] = None, end: Optional[float] = None, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    # Whole transcript, or just the segments overlapping [start, end) seconds
+    return await crud_async.get_transcript(db, module_id, start, end)
+
+@router.get("/modules/{module_id}/transcript/search", response_model=List[schemas.TranscriptSegment])
+async def search_transcript(module_id: int, q: str, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    # Where in the video a phrase is spoken; start_time is the seek position
+    if not q.strip():
+        return []
+    return await crud_async.find_in_transcript(db, module_id, q.strip())
+
+@router.get("/modules/{module_id}/related", response_model=List[schemas.SemanticResult])
+def read_related_modules(module_id: int, limit: int = 5, current_user: schemas.UserMe = Depends(get_current_user)):
+    from ..services import embeddings
+    related = embeddings.get_index().related_modules(module_id, limit=limit)
+    if related is None:
+        raise HTTPException(status_code=404, detail="Module not found")
+    return related
 
-@router.put("/modules/{module_id}", response_model=schemas.Module)
-def update_module(module_id: int, module: schemas.ModuleCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+@router.put("/modules/{module_id}", response_model=schemas.ModuleDraft)
+def update_module(module_id: int, module: schemas.ModuleCreate, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
     # TODO: Check admin permissions
-    db_module = crud.update_module(db, module_id, module)
-    if not db_module:
+    # Saves a draft; learners keep the published content (and grading) until POST /publish
+    if db.query(models.Module.is_processing).filter(models.Module.id == module_id).scalar():
+        raise HTTPException(status_code=409, detail="Module is still processing")
+    if not crud.save_draft(db, module_id, module):
         raise HTTPException(status_code=404, detail="Module not found")
-    return db_module
+    db.commit()
+    return crud.get_module_draft(db, module_id)
 
 @router.delete("/modules/{module_id}")
-def delete_module(module_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def delete_module(module_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
     # TODO: Check admin permissions
     db_module = crud.get_module(db, module_id)
     if not db_module:
         raise HTTPException(status_code=404, detail="Module not found")
     
-    # Delete user progress (unassign from all users)
-    db.query(models.UserProgress).filter(models.UserProgress.module_id == module_id).delete()
-    # Delete associated steps
-    db.query(models.ModuleStep).filter(models.ModuleStep.module_id == module_id).delete()
-    # Delete the module
-    db.delete(db_module)
+    # Media paths are needed after the rows are gone, to reclaim the files
+    media = storage.module_media_paths(db, module_id)
+    assigned_user_ids = crud.delete_module(db, module_id)
+    analytics.forget_module(db, module_id, assigned_user_ids)
     db.commit()
+    background_tasks.add_task(_refresh_module_vectors, module_id)
+    background_tasks.add_task(storage.reclaim_module_media, module_id, media)
     
     return {"message": "Module deleted successfully"}
 
 @router.post("/steps/{step_id}/submit", response_model=schemas.SubmissionResult)
-def submit_step(step_id: int, submission: schemas.StepSubmission, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    step = db.query(models.ModuleStep).filter(models.ModuleStep.id == step_id).first()
+async def submit_step(step_id: int, submission: schemas.StepSubmission, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    step = await crud_async.get_step(db, step_id)
     if not step:
         raise HTTPException(status_code=404, detail="Step not found")
     
     passed = crud.validate_step(step, submission.value)
     
-    # Update progress
-    crud.update_progress(db, current_user.id, step.module_id, step.order_index, passed)
+    # Progress is one atomic, forward-only upsert; the answer itself is logged write-behind
+    await crud_async.update_progress(db, current_user.id, step.module_id, step.order_index, passed)
+    attempt_log.record(current_user.id, step.module_id, step.id, step.order_index, submission.value, passed)
     
     msg = "Correct!" if passed else "Incorrect. Please try again."
     if not passed and step.assignment and step.assignment.tolerance:
@@ -167,36 +408,118 @@ def submit_step(step_id: int, submission: schemas.StepSubmission, db: Session =
 
     return {"passed": passed, "message": msg, "correct_value": step.assignment.correct_value if step.assignment else None}
 
+# --- Quiz ---
+
+@router.get("/modules/{module_id}/quiz", response_model=List[schemas.QuizQuestion])
+async def read_quiz(module_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    return await crud_async.get_quiz_questions(db, module_id)
+
+@router.get("/modules/{module_id}/quiz/answers", response_model=List[schemas.QuizQuestionWithAnswer])
+async def read_quiz_answers(module_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    # For the course editor only
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return await crud_async.get_quiz_questions(db, module_id)
+
+@router.post("/modules/{module_id}/quiz/submit", response_model=schemas.QuizResult)
+async def submit_quiz(module_id: int, submission: schemas.QuizSubmission, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    answers = {a.question_id: a.value for a in submission.answers}
+    result = await crud_async.submit_quiz(db, current_user.id, module_id, answers)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return result
+
 # --- Comments ---
 
 @router.post("/comments", response_model=schemas.Comment)
-def add_comment(comment: schemas.CommentCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def add_comment(comment: schemas.CommentCreate, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
     return crud.create_comment(db, comment, current_user.id)
 
-@router.get("/modules/{module_id}/comments", response_model=List[schemas.Comment])
-def read_comments(module_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.get_comments_for_module(db, module_id)
+@router.get("/modules/{module_id}/comments", response_model=schemas.Page[schemas.Comment])
+async def read_comments(module_id: int, page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    return await crud_async.get_comments_for_module(db, module_id, page)
+
+@router.get("/modules/{module_id}/comments/threads", response_model=schemas.Page[schemas.CommentThread])
+async def read_comment_threads(module_id: int, cursor: Optional[str] = None, limit: int = 20, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    # Threads can be large, so default to a smaller page than flat listings
+    page = page_params(cursor, min(limit, 100))
+    return await crud_async.get_comment_threads(db, module_id, page)
 
 # --- Learning Resources ---
 
-@router.get("/resources", response_model=List[schemas.LearningResource])
-def read_resources(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.get_all_resources(db)
+@router.get("/resources", response_model=schemas.Page[schemas.LearningResource])
+def read_resources(page: PageParams = Depends(page_params), db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    return crud.get_resources(db, page)
+
+@router.get("/resources/{resource_id}", response_model=schemas.LearningResource)
+async def read_resource(resource_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    resource = await crud_async.get_resource(db, resource_id)
+    if not resource:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    etag = http_cache.resource_etag(resource)
+    if http_cache.not_modified(request, etag):
+        return http_cache.not_modified_response(etag)
+    http_cache.set_etag(response, etag)
+    return resource
 
 @router.post("/resources", response_model=schemas.LearningResource)
-def create_resource(resource: schemas.LearningResourceCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def create_resource(resource: schemas.LearningResourceCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
     # TODO: Check admin permissions
-    return crud.create_resource(db, resource)
+    db_resource = crud.create_resource(db, resource)
+    background_tasks.add_task(_refresh_resource_vectors, db_resource.id)
+    return db_resource
 
 # --- File Upload ---
 
-from fastapi import UploadFile, File
 import shutil
 import os
 import uuid
 
+# --- Search ---
+@router.get("/search", response_model=List[schemas.SearchResult])
+def search_content(q: str, kind: Optional[List[str]] = Query(None), limit: int = 20, db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    return search.search(db, q, kinds=kind, limit=limit)
+
+@router.get("/search/semantic", response_model=List[schemas.SemanticResult])
+def semantic_search(q: str, kind: Optional[List[str]] = Query(None), limit: int = 10, current_user: schemas.UserMe = Depends(get_current_user)):
+    from ..services import embeddings
+    return embeddings.get_index().search(q, kinds=kind, limit=limit)
+
+@router.post("/admin/search/rebuild")
+def rebuild_search_index(db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return search.rebuild(db)
+
+@router.post("/admin/storage/sweep")
+async def sweep_storage(dry_run: bool = True, current_user: schemas.UserMe = Depends(get_current_user)):
+    # Defaults to a dry run: nothing is deleted unless ?dry_run=false
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return await storage.sweeper.run_once(dry_run=dry_run)
+
+@router.get("/admin/storage/sweeper")
+def read_storage_sweeper(current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return storage.sweeper.stats()
+
+@router.get("/admin/embeddings")
+def read_embeddings_stats(current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    from ..services import embeddings
+    return embeddings.vector_index.stats()
+
+@router.post("/admin/embeddings/rebuild")
+def rebuild_embeddings(db: Session = Depends(get_db), current_user: schemas.UserMe = Depends(get_current_user)):
+    if current_user.role_id != 1:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    from ..services import embeddings
+    return embeddings.get_index().rebuild(db)
+
 @router.post("/upload/video")
-async def upload_video(file: UploadFile = File(...), current_user: models.User = Depends(get_current_user)):
+async def upload_video(file: UploadFile = File(...), current_user: schemas.UserMe = Depends(get_current_user)):
     # TODO: Check admin permissions
     
     # Generate unique filename
@@ -1,9 +1,10 @@
 from sqlalchemy.orm import Session
-from .. import crud, models, schemas
+from .. import crud, models, schemas, search
 from ..database import SessionLocal
-from ..services.video_segmentor import CourseGenerator
+from ..services.transcripts import format_transcript, parse_transcript
+from ..services import embeddings
+from ..scheduler import ENCODE_THREADS, slot
 import os
-import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -25,9 +26,11 @@ def process_video_task(module_id: int, video_path: str, description: str = None)
         if not api_key:
             print("❌ GROQ_API_KEY not found. Skipping AI processing.")
             module.is_processing = False
+            crud.bump_module_version(db, module.id)
             db.commit()
             return
 
+        from ..services.video_segmentor import CourseGenerator # heavy; keep it out of API startup
         generator = CourseGenerator(api_key=api_key)
         
         # 1. Analyze Structure & Generate Content
@@ -45,12 +48,23 @@ def process_video_task(module_id: int, video_path: str, description: str = None)
         # Note: We need to adapt the generator to return data instead of just writing files
         # Or we use the generator's methods directly here.
         
-        # A. Analyze Structure
-        modules_data, transcript_text = generator.analyze_structure(abs_video_path, description=description)
+        # A. Analyze Structure (a stored transcript from an earlier run skips transcription)
+        stored = crud.get_transcript_segments(db, module.id)
+        stored_text = format_transcript((s.start_time, s.end_time, s.text) for s in stored) if stored else None
+        modules_data, transcript_text = generator.analyze_structure(
+            abs_video_path, description=description, transcript_text=stored_text
+        )
+        
+        # Keep the transcript even if structuring failed, so a retry doesn't pay for Whisper again
+        if transcript_text and not stored:
+            crud.replace_transcript(db, module.id, parse_transcript(transcript_text))
+            search.index_transcript(db, module.id)
+            db.commit()
         
         if not modules_data:
             print("❌ No modules generated.")
             module.is_processing = False
+            crud.bump_module_version(db, module.id)
             db.commit()
             return
 
@@ -63,13 +77,18 @@ def process_video_task(module_id: int, video_path: str, description: str = None)
         
         # C. Generate Quiz (with module references)
         quiz_data = generator.generate_quiz(transcript_text, modules_data=modules_data, description=description)
-        module.quiz_data = json.dumps(quiz_data)
+        crud.replace_quiz(db, module.id, crud.quiz_from_generated(quiz_data))
         
+        crud.bump_module_version(db, module.id)
         db.commit() # Save progress
         
         # D. Process Segments (Cut Video & Generate Notes)
+        # A run interrupted by a restart may have left some steps behind; they are cut again
+        crud.delete_module_steps(db, module.id)
+        db.commit()
         from moviepy.video.io.VideoFileClip import VideoFileClip
         
+        step_ranges = []
         with VideoFileClip(abs_video_path) as video:
             for idx, mod_data in enumerate(modules_data):
                 topic = mod_data['topic_name']
@@ -89,7 +108,9 @@ def process_video_task(module_id: int, video_path: str, description: str = None)
                 
                 if start < end:
                     new_clip = video.subclipped(start_time=start, end_time=end)
-                    new_clip.write_videofile(segment_abs_path, codec="libx264", audio_codec="aac", logger=None)
+                    with slot("encode"):
+                        new_clip.write_videofile(segment_abs_path, codec="libx264", audio_codec="aac",
+                                                 threads=ENCODE_THREADS, logger=None)
                 
                 # Generate Notes
                 notes_content = generator.generate_module_content(abs_video_path, topic, start, end, transcript_text, description)
@@ -104,11 +125,21 @@ def process_video_task(module_id: int, video_path: str, description: str = None)
                     media_url=f"http://localhost:8000/{segment_rel_path}" # TODO: Use proper base URL
                 )
                 db.add(step)
+                crud.bump_module_version(db, module.id)
                 db.commit()
+                step_ranges.append((step.id, start, end))
         
         # Mark as done
+        crud.tag_transcript_steps(db, module.id, step_ranges)
         module.is_processing = False
+        crud.bump_module_version(db, module.id)
+        search.index_module(db, module.id)
         db.commit()
+        crud.publish_module(db, module.id)
+        db.commit()
+
+        # E. Embed for related-module / semantic lookups
+        embeddings.get_index().update_module(db, module.id)
         print(f"✅ Processing complete for Module {module_id}")
 
     except Exception as e:
@@ -118,6 +149,7 @@ def process_video_task(module_id: int, video_path: str, description: str = None)
         # Try to mark as failed
         try:
             module.is_processing = False
+            crud.bump_module_version(db, module.id)
             db.commit()
         except:
             pass
@@ -0,0 +1,245 @@
+"""
+Write-behind buffer for step attempts.
+
+/steps/{step_id}/submit used to throw the answer away once it had been
+graded. Submissions are now also recorded as StepAttempt events: record()
+appends to an in-memory buffer and a local spool file and returns immediately.
+A background task flushes the buffer when it reaches ATTEMPT_FLUSH_SIZE
+entries or every ATTEMPT_FLUSH_INTERVAL seconds, inserting the batch in a
+single transaction. Progress isn't derived from the log: the endpoint still
+runs the monotonic user_progress upsert itself, so reads from any worker see
+it at once.
+
+Crash safety: every attempt is in the spool before record() returns. On
+startup, anything left in the spool is replayed. Attempts carry a uuid, so
+entries that were committed just before a crash are skipped on replay.
+The attempt history lags submissions by at most one flush interval. The spool
+belongs to one process: give each worker its own ATTEMPT_SPOOL_DIR.
+
+Attempts whose module or user was deleted while they sat in the buffer are
+dropped at flush time rather than written back as orphans (or, with foreign
+keys, failing the whole batch). A batch that still fails ATTEMPT_FLUSH_RETRIES
+flushes in a row is moved to a dead-letter file (attempts.*.dead in the
+spool directory) so later attempts aren't stuck behind it. Dead-letter files
+aren't replayed; rename one to *.segment to retry it on the next start.
+"""
+import asyncio
+import glob
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select
+
+from . import crud, models
+from .database import AsyncSessionLocal
+
+FLUSH_SIZE = int(os.getenv("ATTEMPT_FLUSH_SIZE", "500"))
+FLUSH_INTERVAL = float(os.getenv("ATTEMPT_FLUSH_INTERVAL", "1.0"))
+FLUSH_RETRIES = int(os.getenv("ATTEMPT_FLUSH_RETRIES", "5")) # consecutive failures before a batch is dead-lettered
+SPOOL_DIR = os.getenv("ATTEMPT_SPOOL_DIR", "spool")
+SPOOL_FSYNC = os.getenv("ATTEMPT_SPOOL_FSYNC", "0") == "1" # survive power loss, not just process crashes
+
+_ACTIVE = "attempts.ndjson"
+
+
+class AttemptLog:
+    def __init__(self, spool_dir: str = SPOOL_DIR, flush_size: int = FLUSH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, fsync: bool = SPOOL_FSYNC, retries: int = FLUSH_RETRIES):
+        self.spool_dir = spool_dir
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.retries = max(1, retries)
+        self._failures = 0 # consecutive failed flushes of the batch at the head of the buffer
+        self._buffer = []
+        self._segments = [] # spool files whose attempts are buffered but not yet committed
+        self._spool = None
+        self._segment_seq = 0
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flushed = 0
+        self.flush_errors = 0
+        self.dropped = 0
+        self.dead_lettered = 0
+        self.last_flush_at: Optional[float] = None
+        self.last_flush_ms: Optional[float] = None
+
+    # --- spool ---
+    def _open_spool(self):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._spool = open(os.path.join(self.spool_dir, _ACTIVE), "a", encoding="utf-8")
+
+    def _rotate_spool(self):
+        """Seal the active spool file as a segment covering everything buffered so far."""
+        if self._spool is None:
+            return
+        self._spool.close()
+        active = os.path.join(self.spool_dir, _ACTIVE)
+        if os.path.getsize(active):
+            self._segment_seq += 1
+            segment = os.path.join(self.spool_dir, f"attempts.{int(time.time() * 1000)}-{self._segment_seq}.segment")
+            os.replace(active, segment)
+            self._segments.append(segment)
+        self._open_spool()
+
+    def _replay(self):
+        """Buffer everything a previous process left in the spool; returns the number of attempts."""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        active = os.path.join(self.spool_dir, _ACTIVE)
+        if os.path.exists(active):
+            os.replace(active, os.path.join(self.spool_dir, f"attempts.{int(time.time() * 1000)}-0.segment"))
+        paths = sorted(glob.glob(os.path.join(self.spool_dir, "attempts.*.segment")))
+        seen = set()
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        attempt = json.loads(line)
+                    except ValueError:
+                        continue # torn final line from a crash mid-write
+                    if attempt["attempt_uuid"] not in seen:
+                        seen.add(attempt["attempt_uuid"])
+                        self._buffer.append(attempt)
+        self._segments.extend(paths)
+        return len(seen)
+
+    def _remove_segments(self):
+        for segment in self._segments:
+            try:
+                os.remove(segment)
+            except FileNotFoundError:
+                pass
+        self._segments = []
+
+    def _dead_letter(self, batch):
+        """Park a batch that keeps failing in a dead-letter file and release its segments."""
+        path = os.path.join(self.spool_dir, f"attempts.{int(time.time() * 1000)}.dead")
+        with open(path, "a", encoding="utf-8") as f:
+            for attempt in batch:
+                f.write(json.dumps(attempt, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._remove_segments()
+        self.dead_lettered += len(batch)
+        return path
+
+    async def _drop_orphans(self, db, batch):
+        """Attempts whose module or user still exists; the rest were deleted while buffered."""
+        module_ids = {a["module_id"] for a in batch}
+        user_ids = {a["user_id"] for a in batch}
+        live_modules = set((await db.execute(select(models.Module.id).where(models.Module.id.in_(module_ids)))).scalars())
+        live_users = set((await db.execute(select(models.User.id).where(models.User.id.in_(user_ids)))).scalars())
+        live = [a for a in batch if a["module_id"] in live_modules and a["user_id"] in live_users]
+        self.dropped += len(batch) - len(live)
+        return live
+
+    # --- public API ---
+    def record(self, user_id: int, module_id: int, step_id: int, step_index: int, value: str, passed: bool):
+        attempt = {
+            "attempt_uuid": uuid.uuid4().hex,
+            "user_id": user_id,
+            "module_id": module_id,
+            "step_id": step_id,
+            "step_index": step_index,
+            "value": value,
+            "passed": passed,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        if self._spool is None:
+            self._open_spool()
+        self._spool.write(json.dumps(attempt, separators=(",", ":")) + "\n")
+        self._spool.flush()
+        if self.fsync:
+            os.fsync(self._spool.fileno())
+        self._buffer.append(attempt)
+        if len(self._buffer) >= self.flush_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+            batch, self._buffer = self._buffer, []
+            self._rotate_spool()
+            started = time.perf_counter()
+            try:
+                async with AsyncSessionLocal() as db:
+                    live = await self._drop_orphans(db, batch)
+                    rows = [{**a, "created_at": datetime.fromisoformat(a["created_at"])} for a in live]
+                    for i in range(0, len(rows), self.flush_size):
+                        await db.execute(crud.attempts_insert(db, rows[i:i + self.flush_size]))
+                    await db.commit()
+            except Exception as e:
+                self.flush_errors += 1
+                self._failures += 1
+                if self._failures >= self.retries:
+                    self._failures = 0
+                    path = self._dead_letter(batch)
+                    print(f"⚠️ Attempt log flush failed {self.retries} times, {len(batch)} attempt(s) moved to {path}: {e}")
+                    return 0
+                # Keep the attempts (and their segments) for the next round
+                self._buffer = batch + self._buffer
+                print(f"⚠️ Attempt log flush failed, {len(batch)} attempt(s) kept for retry: {e}")
+                return 0
+            self._failures = 0
+            self._remove_segments()
+            self.flushed += len(live)
+            self.last_flush_at = time.time()
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 1)
+            return len(live)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def start(self):
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        replayed = self._replay()
+        self._open_spool()
+        if replayed:
+            print(f"Replaying {replayed} spooled step attempt(s)")
+            await self.flush()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._buffer),
+            "pending_segments": len(self._segments),
+            "flushed": self.flushed,
+            "flush_errors": self.flush_errors,
+            "dropped": self.dropped,
+            "dead_lettered": self.dead_lettered,
+            "last_flush_at": self.last_flush_at,
+            "last_flush_ms": self.last_flush_ms,
+            "flush_size": self.flush_size,
+            "flush_interval": self.flush_interval,
+        }
+
+
+attempt_log = AttemptLog()
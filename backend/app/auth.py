@@ -1,20 +1,100 @@
 from passlib.context import CryptContext
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
+import asyncio
+import os
+import threading
+import time
 
 # Secret key for JWT (should be in env)
 SECRET_KEY = "supersecretkeywhichshouldbechanged"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 10080 # 7 days
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost; stored hashes below this are upgraded on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+# --- Bounded hashing executor ---
+# bcrypt is deliberately CPU-heavy. All hashing/verification runs on a small
+# dedicated pool so a login rush can't take over the request threadpool or
+# every core; beyond HASH_MAX_PENDING queued jobs we shed load instead of queueing.
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="pwhash")
+_pending = 0
+_pending_lock = threading.Lock()
+
+class HashingOverloaded(Exception):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+def _release(_future):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+def _submit(fn, *args) -> Future:
+    global _pending
+    with _pending_lock:
+        if _pending >= HASH_MAX_PENDING:
+            raise HashingOverloaded()
+        _pending += 1
+    try:
+        future = _hash_executor.submit(fn, *args)
+    except Exception:
+        _release(None)
+        raise
+    future.add_done_callback(_release)
+    return future
+
+def hashing_stats() -> dict:
+    return {"workers": HASH_WORKERS, "pending": _pending, "max_pending": HASH_MAX_PENDING, "rounds": BCRYPT_ROUNDS}
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return _submit(pwd_context.verify, plain_password, hashed_password).result()
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return _submit(pwd_context.hash, password).result()
+
+def hash_many(passwords):
+    """Hash a batch in parallel on the shared pool, never holding more than
+    HASH_WORKERS slots so interactive logins still get through."""
+    hashes = [None] * len(passwords)
+    in_flight = []
+    for i, password in enumerate(passwords):
+        if len(in_flight) >= HASH_WORKERS:
+            idx, future = in_flight.pop(0)
+            hashes[idx] = future.result()
+        while True:
+            try:
+                in_flight.append((i, _submit(pwd_context.hash, password)))
+                break
+            except HashingOverloaded:
+                # Queue is full of other callers' work: drain our own or back off
+                if in_flight:
+                    idx, future = in_flight.pop(0)
+                    hashes[idx] = future.result()
+                else:
+                    time.sleep(0.05)
+    for idx, future in in_flight:
+        hashes[idx] = future.result()
+    return hashes
+
+async def verify_password_async(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """Returns (valid, new_hash); new_hash is set when the stored hash is below the target cost."""
+    return await asyncio.wrap_future(_submit(pwd_context.verify_and_update, plain_password, hashed_password))
+
+async def get_password_hash_async(password):
+    return await asyncio.wrap_future(_submit(pwd_context.hash, password))
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -1,13 +1,21 @@
-from sqlalchemy.orm import Session
-from . import models, schemas
+from pydantic import ValidationError
+from sqlalchemy import and_, case, delete, func, insert, literal, or_, select, true, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+from . import models, schemas, search, serialization
+from .pagination import PageParams, keyset, make_page
 from typing import Optional
+import gzip
+import json
+import os
 
 # --- User Management ---
 def get_user_by_code(db: Session, employee_code: str):
     return db.query(models.User).filter(models.User.employee_code == employee_code).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
+def get_users(db: Session, page: PageParams):
+    stmt = select(models.User).options(selectinload(models.User.role), selectinload(models.User.progress))
+    rows = db.execute(keyset(stmt, [models.User.id], page)).scalars().all()
+    return make_page(rows, page, lambda u: [u.id])
 
 def create_user(db: Session, user: schemas.UserCreate):
     from .auth import get_password_hash
@@ -35,55 +43,279 @@ def register_user(db: Session, db_user: models.User, password: str):
     db.refresh(db_user)
     return db_user
 
+def bulk_import_users(db: Session, rows, batch_size: int = 500):
+    """
+    Import users from an iterable of (row_number, dict) pairs, e.g. a streamed CSV.
+    Existing codes are checked per batch with a single IN query, passwords are
+    hashed in parallel and every batch is inserted with one executemany; the
+    whole import commits once.
+    """
+    from .auth import hash_many
+    result = schemas.UserImportResult()
+    valid_role_ids = {role_id for (role_id,) in db.query(models.Role.id)}
+    seen_codes = set()
+    batch = []
+
+    def fail(row_no, code, error):
+        result.errors.append(schemas.UserImportError(row=row_no, employee_code=code, error=error))
+
+    def flush():
+        codes = [user.employee_code for _, user in batch]
+        existing = {code for (code,) in db.query(models.User.employee_code).filter(models.User.employee_code.in_(codes))}
+        fresh = []
+        for row_no, user in batch:
+            if user.employee_code in existing:
+                fail(row_no, user.employee_code, "User already exists")
+            else:
+                fresh.append(user)
+
+        to_hash = [user for user in fresh if user.password]
+        hashes = dict(zip((user.employee_code for user in to_hash), hash_many([user.password for user in to_hash])))
+        records = [
+            {
+                "employee_code": user.employee_code,
+                "role_id": user.role_id,
+                "phone_number": user.phone_number,
+                "hashed_password": hashes.get(user.employee_code),
+                "is_registered": user.employee_code in hashes,
+                "is_active": True,
+            }
+            for user in fresh
+        ]
+        if records:
+            db.execute(insert(models.User), records)
+        result.created += len(records)
+        batch.clear()
+
+    for row_no, raw in rows:
+        result.total_rows += 1
+        if not isinstance(raw, dict):
+            fail(row_no, None, "Malformed row")
+            continue
+        code = raw.get("employee_code")
+        try:
+            user = schemas.UserCreate(**{k: v for k, v in raw.items() if v not in (None, "")})
+        except ValidationError as e:
+            fail(row_no, code, "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()))
+            continue
+        if user.role_id not in valid_role_ids:
+            fail(row_no, user.employee_code, f"Unknown role_id {user.role_id}")
+            continue
+        if user.employee_code in seen_codes:
+            fail(row_no, user.employee_code, "Duplicate employee_code in upload")
+            continue
+        seen_codes.add(user.employee_code)
+        batch.append((row_no, user))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    db.commit()
+    result.errors.sort(key=lambda e: e.row)
+    return result
+
 # --- Module Management ---
+def _new_step(step_data: schemas.ModuleStepCreate) -> models.ModuleStep:
+    db_step = models.ModuleStep(
+        title=step_data.title,
+        content=step_data.content,
+        media_url=step_data.media_url,
+        step_type=step_data.step_type,
+        order_index=step_data.order_index
+    )
+    if step_data.assignment:
+        db_step.assignment = models.AssignmentQuestion(**step_data.assignment.dict())
+    return db_step
+
 def create_module_with_steps(db: Session, module: schemas.ModuleCreate, creator_id: int):
-    # 1. Create Module
+    # Module, steps and assignments go out in one flush (steps/assignments are
+    # batched into multi-row INSERTs) and one commit
     db_module = models.Module(
         title=module.title,
         description=module.description,
         video_url=module.video_url,
-        created_by_id=creator_id
+        created_by_id=creator_id,
+        steps=[_new_step(step_data) for step_data in module.steps],
+        quiz_questions=[_new_quiz_question(i, q) for i, q in enumerate(module.quiz or [])]
     )
     db.add(db_module)
+    db.flush()
+    search.index_module(db, db_module.id)
     db.commit()
-    db.refresh(db_module)
-
-    # 2. Create Steps
-    for step_data in module.steps:
-        db_step = models.ModuleStep(
-            module_id=db_module.id,
-            title=step_data.title,
-            content=step_data.content,
-            media_url=step_data.media_url,
-            step_type=step_data.step_type,
-            order_index=step_data.order_index
-        )
-        db.add(db_step)
-        db.commit()
-        db.refresh(db_step)
-
-        # 3. Create Assignment if exists
-        if step_data.assignment:
-            db_assign = models.AssignmentQuestion(
-                step_id=db_step.id,
-                question_text=step_data.assignment.question_text,
-                correct_value=step_data.assignment.correct_value,
-                tolerance=step_data.assignment.tolerance,
-                unit=step_data.assignment.unit
-            )
-            db.add(db_assign)
-            db.commit()
-    
     return db_module
 
 def get_module(db: Session, module_id: int):
     return db.query(models.Module).filter(models.Module.id == module_id).first()
 
-def get_all_modules(db: Session):
-    return db.query(models.Module).all()
+def bump_module_version(db: Session, module_id: int):
+    # Any change to what GET /modules/{id} returns must go through here; the caller commits
+    db.query(models.Module).filter(models.Module.id == module_id).update(
+        {models.Module.version: models.Module.version + 1}, synchronize_session=False
+    )
+
+def module_version_query(module_id: int):
+    # Just the ETag inputs, for conditional GETs
+    m = models.Module
+    return select(m.id, m.version, m.comment_count, m.reply_count).where(m.id == module_id)
+
+# Tables keyed by module_id, deleted before the module itself (module_role_stats is analytics' job)
+MODULE_CHILD_TABLES = (
+    models.QuizQuestion, models.UserProgress, models.StepAttempt, models.TranscriptSegment,
+    models.ModuleSnapshot, models.ModuleDraft, models.Comment, models.ModuleRoleStats,
+)
+
+def module_cascade(module_ids):
+    """
+    DELETE statements removing modules and everything under them, children
+    first. `module_ids` is a list or a subquery, so each table takes a single
+    set-based statement however many modules there are.
+    """
+    step_ids = select(models.ModuleStep.id).where(models.ModuleStep.module_id.in_(module_ids))
+    return [
+        delete(models.AssignmentQuestion).where(models.AssignmentQuestion.step_id.in_(step_ids)),
+        delete(models.ModuleStep).where(models.ModuleStep.module_id.in_(module_ids)),
+        *[delete(t).where(t.module_id.in_(module_ids)) for t in MODULE_CHILD_TABLES],
+        delete(models.Module).where(models.Module.id.in_(module_ids)),
+    ]
+
+def delete_module_steps(db: Session, module_id: int):
+    # Steps and assignments only, for the pipeline to regenerate them; the caller commits
+    step_ids = select(models.ModuleStep.id).where(models.ModuleStep.module_id == module_id)
+    db.execute(delete(models.AssignmentQuestion).where(models.AssignmentQuestion.step_id.in_(step_ids)))
+    db.execute(delete(models.ModuleStep).where(models.ModuleStep.module_id == module_id))
+
+def claim_stranded_modules(db: Session):
+    """
+    Modules still marked processing when the API starts: their pipeline job
+    was queued or running in a process that has since stopped. Each one is
+    claimed with a compare-and-set on its version, so when several workers
+    start together only one of them gets it. The caller commits.
+    """
+    m = models.Module
+    stranded = db.execute(
+        select(m.id, m.version, m.video_url, m.description, m.created_by_id).where(m.is_processing.is_(True))
+    ).all()
+    return [
+        row for row in stranded
+        if db.execute(
+            update(m).where(m.id == row.id, m.version == row.version).values(version=m.version + 1)
+        ).rowcount
+    ]
+
+def delete_module(db: Session, module_id: int):
+    """Delete a module with its steps, quiz, progress, attempts, transcript, snapshots, draft, comments and rollups; the caller commits. Returns the learners it was assigned to."""
+    user_ids = db.execute(
+        select(models.UserProgress.user_id).where(models.UserProgress.module_id == module_id)
+    ).scalars().all()
+    search.remove_module(db, module_id)
+    for stmt in module_cascade([module_id]):
+        db.execute(stmt)
+    return user_ids
+
+# --- Published snapshots ---
+# Discussion counters move independently of the content, so they aren't frozen into snapshots
+SNAPSHOT_EXCLUDE = {"comment_count", "reply_count"}
+
+def publish_module(db: Session, module_id: int):
+    """
+    Apply the module's pending draft to the live rows, then serialize the
+    learner view once, store it gzipped under the module's version and point
+    published_version at it. Older snapshots are dropped. The caller commits;
+    returns the snapshot, or None if the module doesn't exist.
+    """
+    draft = db.get(models.ModuleDraft, module_id)
+    if draft is not None:
+        if not update_module(db, module_id, schemas.ModuleCreate.model_validate_json(draft.body)):
+            return None
+        db.delete(draft)
+    # populate_existing: pick up a version bumped earlier in this transaction
+    module = db.execute(
+        module_with_steps_query(module_id).execution_options(populate_existing=True)
+    ).scalars().first()
+    if not module:
+        return None
+    module.published_version = module.version
+    adapter = serialization.module_adapter
+    raw = adapter.dump_json(adapter.validate_python(module, from_attributes=True), exclude=SNAPSHOT_EXCLUDE)
+    snapshot = models.ModuleSnapshot(
+        module_id=module.id, version=module.version, size=len(raw),
+        body=gzip.compress(raw, compresslevel=9, mtime=0),
+    )
+    db.query(models.ModuleSnapshot).filter(models.ModuleSnapshot.module_id == module.id).delete(synchronize_session=False)
+    db.add(snapshot)
+    return snapshot
+
+def published_snapshot_query(module_id: int):
+    # The learner read path: one primary-key lookup on each table
+    s, m = models.ModuleSnapshot, models.Module
+    return select(s.version, s.body).join(
+        m, and_(m.id == s.module_id, m.published_version == s.version)
+    ).where(s.module_id == module_id)
+
+# Statement builders are shared with crud_async so both paths run identical SQL
+def module_with_steps_query(module_id: int):
+    # Detail view: load steps and their assignments up front (2 extra queries total, not N+1)
+    return select(models.Module).options(
+        selectinload(models.Module.steps).selectinload(models.ModuleStep.assignment)
+    ).where(models.Module.id == module_id)
+
+def module_summaries_query(page: PageParams):
+    # Catalog view: one aggregated query, no step contents
+    first_step_media = (
+        select(models.ModuleStep.media_url)
+        .where(models.ModuleStep.module_id == models.Module.id)
+        .order_by(models.ModuleStep.order_index)
+        .limit(1)
+        .correlate(models.Module)
+        .scalar_subquery()
+    )
+    stmt = select(
+        models.Module.id,
+        models.Module.title,
+        models.Module.description,
+        models.Module.video_url,
+        models.Module.created_by_id,
+        models.Module.is_processing,
+        models.Module.comment_count,
+        func.count(models.ModuleStep.id).label("step_count"),
+        first_step_media.label("thumbnail_url"),
+    ).outerjoin(
+        models.ModuleStep, models.ModuleStep.module_id == models.Module.id
+    ).group_by(models.Module.id)
+    return keyset(stmt, [models.Module.id], page)
+
+def get_module_with_steps(db: Session, module_id: int):
+    return db.execute(module_with_steps_query(module_id)).scalars().first()
+
+def get_module_summaries(db: Session, page: PageParams):
+    return make_page(db.execute(module_summaries_query(page)).all(), page, lambda r: [r.id])
+
+def _apply_step_update(db: Session, db_step: models.ModuleStep, step_data: schemas.ModuleStepCreate):
+    # Assigning an unchanged value is a no-op for the unit of work, so only
+    # modified columns end up in the UPDATE
+    db_step.title = step_data.title
+    db_step.content = step_data.content
+    db_step.media_url = step_data.media_url
+    db_step.step_type = step_data.step_type
+    db_step.order_index = step_data.order_index
+
+    # Leave the assignment alone unless the client explicitly sent the field
+    if "assignment" not in step_data.model_fields_set:
+        return
+    if step_data.assignment is None:
+        if db_step.assignment is not None:
+            db.delete(db_step.assignment)
+    elif db_step.assignment is None:
+        db_step.assignment = models.AssignmentQuestion(**step_data.assignment.dict())
+    else:
+        for field, value in step_data.assignment.dict().items():
+            setattr(db_step.assignment, field, value)
 
 def update_module(db: Session, module_id: int, module_update: schemas.ModuleCreate):
-    db_module = get_module(db, module_id)
+    # Writes the live rows learners are graded against, so it only runs from
+    # publish_module; edits wait in module_drafts until then. The caller commits.
+    db_module = get_module_with_steps(db, module_id)
     if not db_module:
         return None
     
@@ -93,47 +325,211 @@ def update_module(db: Session, module_id: int, module_update: schemas.ModuleCrea
     db_module.video_url = module_update.video_url
     db_module.objectives = module_update.objectives
     db_module.applications = module_update.applications
-    db_module.quiz_data = module_update.quiz_data
-    
-    # Update steps (Full replacement strategy for simplicity, or smart update)
-    # For now, we will delete existing steps and recreate them if provided
-    # BUT, we need to be careful not to lose media_urls if not provided back
-    # A better approach for the frontend is to send the full state.
+    if "quiz" in module_update.model_fields_set:
+        replace_quiz(db, module_id, module_update.quiz or [])
     
+    # Diff incoming steps against the stored ones: steps keep their ids (and
+    # assignments) when matched by id, or by order_index for clients that
+    # don't send ids. Unmatched incoming steps are inserted, unmatched
+    # stored steps are deleted.
     if module_update.steps:
-        # Remove old steps
-        db.query(models.ModuleStep).filter(models.ModuleStep.module_id == module_id).delete()
-        
-        # Add new steps
+        existing = {s.id: s for s in db_module.steps}
+        by_order = {s.order_index: s for s in db_module.steps}
+        matched_ids = set()
+
         for step_data in module_update.steps:
-            db_step = models.ModuleStep(
-                module_id=module_id,
-                title=step_data.title,
-                content=step_data.content,
-                media_url=step_data.media_url,
-                step_type=step_data.step_type,
-                order_index=step_data.order_index
-            )
-            db.add(db_step)
-            
-            if step_data.assignment:
-                db_assign = models.AssignmentQuestion(
-                    step_id=db_step.id, # This ID won't be available until flush/commit if we don't flush
-                    question_text=step_data.assignment.question_text,
-                    correct_value=step_data.assignment.correct_value,
-                    tolerance=step_data.assignment.tolerance,
-                    unit=step_data.assignment.unit
-                )
-                # We need to flush to get the step ID? 
-                # Actually, if we add db_step to session, we can access it after flush
-                db.flush() 
-                db_assign.step_id = db_step.id
-                db.add(db_assign)
-                
-    db.commit()
-    db.refresh(db_module)
+            if step_data.id is not None:
+                db_step = existing.get(step_data.id)
+            else:
+                db_step = by_order.get(step_data.order_index)
+            if db_step is not None and db_step.id not in matched_ids:
+                matched_ids.add(db_step.id)
+                _apply_step_update(db, db_step, step_data)
+            else:
+                new_step = _new_step(step_data)
+                new_step.module_id = module_id
+                db.add(new_step)
+
+        # Removed steps (and their assignments, already loaded) are deleted through
+        # the session so the identity map stays consistent with the rows
+        for step_id, db_step in existing.items():
+            if step_id not in matched_ids:
+                if db_step.assignment is not None:
+                    db.delete(db_step.assignment)
+                db.delete(db_step)
+
+    bump_module_version(db, module_id)
+    db.flush()
+    search.index_module(db, module_id)
     return db_module
 
+# --- Drafts ---
+# ModuleCreate fields that belong to creation only, not to the draft
+DRAFT_EXCLUDE = {"priority"}
+
+def save_draft(db: Session, module_id: int, module_update: schemas.ModuleCreate):
+    """
+    Store edits without touching what learners see. Fields the client sent
+    replace those of an earlier draft; unsent ones (quiz, a step's assignment)
+    stay unset so publishing leaves them alone. The caller commits; returns
+    the draft, or None if the module doesn't exist.
+    """
+    if get_module(db, module_id) is None:
+        return None
+    body = module_update.model_dump(mode="json", exclude_unset=True, exclude=DRAFT_EXCLUDE)
+    draft = db.get(models.ModuleDraft, module_id)
+    if draft is None:
+        draft = models.ModuleDraft(module_id=module_id, body=json.dumps(body))
+        db.add(draft)
+    else:
+        draft.body = json.dumps({**json.loads(draft.body), **body})
+    return draft
+
+def get_module_draft(db: Session, module_id: int):
+    """The edit page's view: the pending draft laid over the live module, with quiz answers."""
+    module = get_module_with_steps(db, module_id)
+    if not module:
+        return None
+    live_steps = {s.id: s for s in module.steps}
+    view = {
+        "id": module.id, "title": module.title, "description": module.description,
+        "video_url": module.video_url, "objectives": module.objectives,
+        "applications": module.applications, "is_processing": module.is_processing,
+        "version": module.version, "published_version": module.published_version,
+        "steps": [schemas.ModuleStepCreate.model_validate(s, from_attributes=True) for s in module.steps],
+        "quiz": [schemas.QuizQuestionCreate.model_validate(q, from_attributes=True) for q in get_quiz_questions(db, module_id)],
+        "has_draft": False,
+    }
+    draft = db.get(models.ModuleDraft, module_id)
+    if draft is not None:
+        edits = schemas.ModuleCreate.model_validate_json(draft.body)
+        view.update(edits.model_dump(include=edits.model_fields_set - {"steps", "quiz"}))
+        if "quiz" in edits.model_fields_set:
+            view["quiz"] = edits.quiz or []
+        # Mirror update_module: an empty step list leaves the live steps as they are
+        if edits.steps:
+            steps = []
+            for step in edits.steps:
+                live = live_steps.get(step.id)
+                if "assignment" not in step.model_fields_set and live is not None and live.assignment is not None:
+                    step = step.model_copy(update={"assignment": schemas.AssignmentQuestionCreate.model_validate(live.assignment, from_attributes=True)})
+                steps.append(step)
+            view["steps"] = steps
+        view["has_draft"] = True
+    return schemas.ModuleDraft(**view)
+
+# --- Quiz ---
+QUIZ_PASS_PERCENT = float(os.getenv("QUIZ_PASS_PERCENT", "70"))
+
+def _new_quiz_question(order_index: int, question: schemas.QuizQuestionCreate):
+    return models.QuizQuestion(order_index=order_index, **question.dict())
+
+def quiz_questions_query(module_id: int):
+    return select(models.QuizQuestion).where(
+        models.QuizQuestion.module_id == module_id
+    ).order_by(models.QuizQuestion.order_index)
+
+def get_quiz_questions(db: Session, module_id: int):
+    return db.execute(quiz_questions_query(module_id)).scalars().all()
+
+def quiz_from_generated(raw_questions) -> list:
+    """Coerce generator output (loosely shaped dicts) into QuizQuestionCreate, dropping malformed entries."""
+    questions = []
+    for raw in raw_questions or []:
+        if not isinstance(raw, dict) or raw.get("correct_answer") is None:
+            continue
+        data = dict(raw)
+        data["correct_answer"] = str(data["correct_answer"])
+        data.setdefault("type", "mcq" if data.get("options") else "fill")
+        if data.get("options") is not None:
+            data["options"] = [str(o) for o in data["options"]]
+        try:
+            questions.append(schemas.QuizQuestionCreate.model_validate(data))
+        except ValidationError:
+            continue
+    return questions
+
+def replace_quiz(db: Session, module_id: int, questions):
+    # Quizzes are edited and regenerated as a whole; the caller commits
+    db.query(models.QuizQuestion).filter(
+        models.QuizQuestion.module_id == module_id
+    ).delete(synchronize_session=False)
+    for i, question in enumerate(questions):
+        db_question = _new_quiz_question(i, question)
+        db_question.module_id = module_id
+        db.add(db_question)
+
+def grade_quiz_answer(question: models.QuizQuestion, value: Optional[str]) -> float:
+    """Score one answer in [0, 1]. Numerical answers inside the tolerance get 50-100% credit."""
+    if value is None:
+        return 0.0
+    if question.type == "numerical" and question.tolerance is not None:
+        try:
+            difference = abs(float(value) - float(question.correct_answer))
+        except ValueError:
+            return 0.0
+        if difference > question.tolerance:
+            return 0.0
+        if difference == 0:
+            return 1.0
+        return max(0.5, 1 - (difference / question.tolerance) * 0.5)
+    if question.type == "mcq":
+        return 1.0 if value == question.correct_answer else 0.0
+    return 1.0 if value.strip().lower() == question.correct_answer.strip().lower() else 0.0
+
+def grade_quiz(questions, answers: dict) -> dict:
+    """Grade a full attempt; `answers` maps question_id -> value. Unanswered questions score 0."""
+    results = []
+    for question in questions:
+        score = grade_quiz_answer(question, answers.get(question.id))
+        results.append({"question_id": question.id, "correct": score > 0, "score": score})
+    total = sum(r["score"] for r in results)
+    percent = round(100.0 * total / len(questions), 1) if questions else 0.0
+    return {"score": percent, "passed": percent >= QUIZ_PASS_PERCENT, "results": results}
+
+# --- Transcripts ---
+TRANSCRIPT_SEARCH_LIMIT = 50
+
+def replace_transcript(db: Session, module_id: int, segments):
+    # segments: (start, end, text) rows from services.transcripts.parse_transcript; the caller commits
+    db.query(models.TranscriptSegment).filter(
+        models.TranscriptSegment.module_id == module_id
+    ).delete(synchronize_session=False)
+    if segments:
+        db.execute(insert(models.TranscriptSegment), [
+            {"module_id": module_id, "start_time": start, "end_time": end, "text": text}
+            for start, end, text in segments
+        ])
+
+def tag_transcript_steps(db: Session, module_id: int, step_ranges):
+    # step_ranges: (step_id, start, end) per generated step; each segment goes to the step it starts in
+    t = models.TranscriptSegment
+    for step_id, start, end in step_ranges:
+        db.query(t).filter(
+            t.module_id == module_id, t.start_time >= start, t.start_time < end
+        ).update({t.step_id: step_id}, synchronize_session=False)
+
+def transcript_query(module_id: int, start: Optional[float] = None, end: Optional[float] = None):
+    # Segments overlapping [start, end), in playback order
+    t = models.TranscriptSegment
+    stmt = select(t).where(t.module_id == module_id)
+    if end is not None:
+        stmt = stmt.where(t.start_time < end)
+    if start is not None:
+        stmt = stmt.where(t.end_time > start)
+    return stmt.order_by(t.start_time, t.id)
+
+def transcript_phrase_query(module_id: int, phrase: str, limit: int = TRANSCRIPT_SEARCH_LIMIT):
+    # Case-insensitive substring match; one module's transcript is a few hundred rows at most
+    t = models.TranscriptSegment
+    escaped = phrase.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return select(t).where(
+        t.module_id == module_id, t.text.ilike(f"%{escaped}%", escape="\\")
+    ).order_by(t.start_time, t.id).limit(limit)
+
+def get_transcript_segments(db: Session, module_id: int):
+    return db.execute(transcript_query(module_id)).scalars().all()
+
 # --- Progress & Validation ---
 def get_user_progress(db: Session, user_id: int, module_id: int):
     return db.query(models.UserProgress).filter(
@@ -141,6 +537,37 @@ def get_user_progress(db: Session, user_id: int, module_id: int):
         models.UserProgress.module_id == module_id
     ).first()
 
+def dashboard_query(user_id: int, page: PageParams):
+    # One joined query: assignment status plus step totals per module
+    step_counts = (
+        select(models.ModuleStep.module_id, func.count(models.ModuleStep.id).label("total_steps"))
+        .group_by(models.ModuleStep.module_id)
+        .subquery()
+    )
+    stmt = select(
+        models.UserProgress.id.label("progress_id"),
+        models.UserProgress.module_id,
+        models.Module.title,
+        models.UserProgress.status,
+        models.UserProgress.current_step_index,
+        func.coalesce(step_counts.c.total_steps, 0).label("total_steps"),
+        models.UserProgress.score,
+    ).join(
+        models.Module, models.Module.id == models.UserProgress.module_id
+    ).outerjoin(
+        step_counts, step_counts.c.module_id == models.UserProgress.module_id
+    ).where(models.UserProgress.user_id == user_id)
+    return keyset(stmt, [models.UserProgress.id], page)
+
+def get_dashboard(db: Session, user_id: int, page: PageParams):
+    return make_page(db.execute(dashboard_query(user_id, page)).all(), page, lambda r: [r.progress_id])
+
+def step_with_assignment_query(step_id: int):
+    # Submission prefetch: step and its assignment in a single round-trip
+    return select(models.ModuleStep).options(
+        joinedload(models.ModuleStep.assignment)
+    ).where(models.ModuleStep.id == step_id)
+
 def validate_step(step: models.ModuleStep, user_value: str) -> bool:
     if not step.assignment:
         return True # No assignment, just an instruction step
@@ -158,20 +585,79 @@ def validate_step(step: models.ModuleStep, user_value: str) -> bool:
     else:
         return user_value.strip().lower() == correct.strip().lower()
 
+def progress_upsert_many(db, rows):
+    """
+    INSERT ... ON CONFLICT (user_id, module_id) DO UPDATE ... RETURNING for
+    step progress. `rows` are {user_id, module_id, current_step_index} dicts
+    with at most one row per (user_id, module_id). current_step_index only
+    ever moves forward, so concurrent or out-of-order submissions can't
+    regress progress. `db` may be a sync or async session (only used to pick
+    the dialect).
+    """
+    progress = models.UserProgress
+    stmt = dialect_insert(db)(progress).values([
+        {**row, "status": "In Progress", "score": 0.0} for row in rows
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "module_id"],
+        set_={
+            "current_step_index": case(
+                (stmt.excluded.current_step_index > progress.current_step_index, stmt.excluded.current_step_index),
+                else_=progress.current_step_index,
+            ),
+            "updated_at": func.now(),
+        },
+    )
+    return stmt.returning(progress).execution_options(populate_existing=True)
+
+def progress_upsert(db, user_id: int, module_id: int, step_index: int, passed: bool):
+    # A pass moves the learner to step_index + 1; a fail only ensures the row exists
+    return progress_upsert_many(db, [{
+        "user_id": user_id,
+        "module_id": module_id,
+        "current_step_index": step_index + 1 if passed else 0,
+    }])
+
+def quiz_result_upsert(db, user_id: int, module_id: int, graded: dict):
+    """
+    INSERT ... ON CONFLICT (user_id, module_id) DO UPDATE recording a graded
+    quiz on the learner's progress, so concurrent submissions can't both
+    insert. `db` may be a sync or async session (only used to pick the dialect).
+    """
+    progress = models.UserProgress
+    stmt = dialect_insert(db)(progress).values(
+        user_id=user_id,
+        module_id=module_id,
+        current_step_index=0,
+        score=graded["score"],
+        status="Completed" if graded["passed"] else "Failed",
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "module_id"],
+        set_={"score": stmt.excluded.score, "status": stmt.excluded.status, "updated_at": func.now()},
+    )
+
+def attempts_insert(db, attempts):
+    # Replayed spool entries are already in the table; skip them by uuid
+    return dialect_insert(db)(models.StepAttempt).values(attempts).on_conflict_do_nothing(
+        index_elements=["attempt_uuid"]
+    )
+
+def attempts_query(page: PageParams, user_id: Optional[int] = None, module_id: Optional[int] = None):
+    stmt = select(models.StepAttempt)
+    if user_id is not None:
+        stmt = stmt.where(models.StepAttempt.user_id == user_id)
+    if module_id is not None:
+        stmt = stmt.where(models.StepAttempt.module_id == module_id)
+    return keyset(stmt, [models.StepAttempt.id], page)
+
+def get_attempts(db: Session, page: PageParams, user_id: Optional[int] = None, module_id: Optional[int] = None):
+    rows = db.execute(attempts_query(page, user_id, module_id)).scalars().all()
+    return make_page(rows, page, lambda a: [a.id])
+
 def update_progress(db: Session, user_id: int, module_id: int, step_index: int, passed: bool):
-    progress = get_user_progress(db, user_id, module_id)
-    if not progress:
-        progress = models.UserProgress(user_id=user_id, module_id=module_id, current_step_index=0, status="In Progress")
-        db.add(progress)
-    
-    if passed:
-        # Move to next step if this was the current step
-        # Note: Logic can be more complex (e.g. only advance if step_index == current)
-        if step_index >= progress.current_step_index:
-             progress.current_step_index = step_index + 1
-    
+    progress = db.execute(progress_upsert(db, user_id, module_id, step_index, passed)).scalars().one()
     db.commit()
-    db.refresh(progress)
     return progress
 
 def assign_module_to_user(db: Session, user_id: int, module_id: int):
@@ -192,6 +678,48 @@ def assign_module_to_user(db: Session, user_id: int, module_id: int):
     db.refresh(progress)
     return progress
 
+def dialect_insert(db: Session):
+    # INSERT construct with ON CONFLICT support for the bound dialect
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        return pg_insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        return sqlite_insert
+    raise NotImplementedError(f"ON CONFLICT inserts are not supported on {dialect}")
+
+def bulk_assign_modules(db: Session, module_ids, user_ids=(), role_ids=()):
+    """
+    Assign modules to explicit users and/or everyone in the given roles with a
+    single INSERT ... SELECT ... ON CONFLICT DO NOTHING. Existing assignments
+    are left untouched (relies on the unique (user_id, module_id) index).
+    """
+    user_filter = []
+    if user_ids:
+        user_filter.append(models.User.id.in_(user_ids))
+    if role_ids:
+        user_filter.append(models.User.role_id.in_(role_ids))
+
+    targets = select(
+        models.User.id,
+        models.Module.id,
+        literal(0),
+        literal("Not Started"),
+        literal(0.0),
+    ).select_from(models.User).join(models.Module, true()).where(
+        models.Module.id.in_(module_ids),
+        or_(*user_filter),
+    )
+
+    matched = db.execute(select(func.count()).select_from(targets.subquery())).scalar()
+    stmt = dialect_insert(db)(models.UserProgress).from_select(
+        ["user_id", "module_id", "current_step_index", "status", "score"], targets
+    ).on_conflict_do_nothing(index_elements=["user_id", "module_id"])
+    assigned = db.execute(stmt).rowcount
+    db.commit()
+    return {"matched": matched, "assigned": assigned, "already_assigned": matched - assigned}
+
 # --- Comments ---
 def create_comment(db: Session, comment: schemas.CommentCreate, user_id: int):
     db_comment = models.Comment(
@@ -201,21 +729,64 @@ def create_comment(db: Session, comment: schemas.CommentCreate, user_id: int):
         parent_id=comment.parent_id
     )
     db.add(db_comment)
+    # Keep the module's counters in the same transaction as the insert
+    db.query(models.Module).filter(models.Module.id == comment.module_id).update({
+        models.Module.comment_count: models.Module.comment_count + 1,
+        models.Module.reply_count: models.Module.reply_count + (1 if comment.parent_id else 0),
+    }, synchronize_session=False)
     db.commit()
     db.refresh(db_comment)
     return db_comment
 
-def get_comments_for_module(db: Session, module_id: int):
-    # Fetch top-level comments (frontend can fetch replies recursively or we eager load)
-    return db.query(models.Comment).filter(models.Comment.module_id == module_id, models.Comment.parent_id == None).all()
+def comments_query(module_id: int, page: PageParams):
+    # Top-level comments, oldest first (use comment_threads_query for replies)
+    stmt = select(models.Comment).where(models.Comment.module_id == module_id, models.Comment.parent_id == None)
+    return keyset(stmt, [models.Comment.created_at, models.Comment.id], page)
+
+def get_comments_for_module(db: Session, module_id: int, page: PageParams):
+    rows = db.execute(comments_query(module_id, page)).scalars().all()
+    return make_page(rows, page, lambda c: [c.created_at, c.id])
+
+def comment_threads_query(module_id: int, page: PageParams):
+    """
+    A page of top-level threads (newest first, keyset on (created_at, id))
+    plus every reply beneath them, via a recursive CTE - one statement.
+    """
+    Comment = models.Comment
+    roots = select(Comment.id).where(Comment.module_id == module_id, Comment.parent_id == None)
+    roots = keyset(roots, [Comment.created_at, Comment.id], page, descending=True)
+
+    thread = select(Comment.id).where(Comment.id.in_(roots)).cte("thread", recursive=True)
+    # Replies share their thread's module; filtering on it keeps the join on ix_comments_module_parent_created
+    thread = thread.union_all(select(Comment.id).where(Comment.module_id == module_id, Comment.parent_id == thread.c.id))
+    return select(Comment).where(Comment.id.in_(select(thread.c.id)))
+
+def build_comment_threads(comments, page: PageParams):
+    """Assemble flat rows from comment_threads_query into a page of nested threads."""
+    # Go through the flat schema so the ORM `replies` relationship is never touched
+    nodes = {c.id: schemas.CommentThread(**schemas.Comment.model_validate(c).model_dump()) for c in comments}
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node.parent_id) if node.parent_id else None
+        if parent is not None:
+            parent.replies.append(node)
+        elif node.parent_id is None:
+            roots.append(node)
+    for node in nodes.values():
+        node.replies.sort(key=lambda n: (n.created_at, n.id))
+    roots.sort(key=lambda n: (n.created_at, n.id), reverse=True)
+    return make_page(roots, page, lambda n: [n.created_at, n.id])
 
 # --- Learning Resources ---
-def get_all_resources(db: Session):
-    return db.query(models.LearningResource).all()
+def get_resources(db: Session, page: PageParams):
+    rows = db.execute(keyset(select(models.LearningResource), [models.LearningResource.id], page)).scalars().all()
+    return make_page(rows, page, lambda r: [r.id])
 
 def create_resource(db: Session, resource: schemas.LearningResourceCreate):
     db_resource = models.LearningResource(**resource.dict())
     db.add(db_resource)
+    db.flush()
+    search.index_resource(db, db_resource.id)
     db.commit()
     db.refresh(db_resource)
     return db_resource
@@ -0,0 +1,109 @@
+"""
+Async versions of the hot read/write paths in crud.py.
+
+These run on the asyncpg/aiosqlite engine so API workers don't tie up a
+threadpool thread per database round-trip. They reuse the statement builders
+from crud.py, so both variants issue the same SQL. Endpoints move over here one
+at a time; everything else keeps using the sync functions.
+
+Anything returned from here is serialized after the session is gone, so every
+relationship a response model touches must be eager-loaded.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from . import crud, models
+from .pagination import PageParams, make_page
+
+# --- User Management ---
+async def get_user_by_code(db: AsyncSession, employee_code: str):
+    result = await db.execute(
+        select(models.User).options(selectinload(models.User.role)).where(models.User.employee_code == employee_code)
+    )
+    return result.scalars().first()
+
+async def register_user(db: AsyncSession, db_user: models.User, password: str):
+    from .auth import get_password_hash_async
+    db_user.hashed_password = await get_password_hash_async(password)
+    db_user.is_registered = True
+    await db.commit()
+    return db_user
+
+# --- Module Management ---
+async def get_module_with_steps(db: AsyncSession, module_id: int):
+    result = await db.execute(crud.module_with_steps_query(module_id))
+    return result.scalars().first()
+
+async def get_module_version(db: AsyncSession, module_id: int):
+    result = await db.execute(crud.module_version_query(module_id))
+    return result.first()
+
+async def get_published_snapshot(db: AsyncSession, module_id: int):
+    result = await db.execute(crud.published_snapshot_query(module_id))
+    return result.first()
+
+async def get_resource(db: AsyncSession, resource_id: int):
+    result = await db.execute(select(models.LearningResource).where(models.LearningResource.id == resource_id))
+    return result.scalars().first()
+
+async def get_module_summaries(db: AsyncSession, page: PageParams):
+    result = await db.execute(crud.module_summaries_query(page))
+    return make_page(result.all(), page, lambda r: [r.id])
+
+# --- Progress & Validation ---
+async def get_dashboard(db: AsyncSession, user_id: int, page: PageParams):
+    result = await db.execute(crud.dashboard_query(user_id, page))
+    return make_page(result.all(), page, lambda r: [r.progress_id])
+
+async def get_step(db: AsyncSession, step_id: int):
+    result = await db.execute(crud.step_with_assignment_query(step_id))
+    return result.scalars().first()
+
+async def get_user_progress(db: AsyncSession, user_id: int, module_id: int):
+    result = await db.execute(
+        select(models.UserProgress).where(
+            models.UserProgress.user_id == user_id,
+            models.UserProgress.module_id == module_id
+        )
+    )
+    return result.scalars().first()
+
+async def update_progress(db: AsyncSession, user_id: int, module_id: int, step_index: int, passed: bool):
+    # One atomic upsert; safe against concurrent submissions for the same learner
+    result = await db.execute(crud.progress_upsert(db, user_id, module_id, step_index, passed))
+    progress = result.scalars().one()
+    await db.commit()
+    return progress
+
+# --- Quiz ---
+async def get_quiz_questions(db: AsyncSession, module_id: int):
+    result = await db.execute(crud.quiz_questions_query(module_id))
+    return result.scalars().all()
+
+async def submit_quiz(db: AsyncSession, user_id: int, module_id: int, answers: dict):
+    """Grade an attempt and record the score on the learner's progress in one transaction."""
+    questions = await get_quiz_questions(db, module_id)
+    if not questions:
+        return None
+    graded = crud.grade_quiz(questions, answers)
+    await db.execute(crud.quiz_result_upsert(db, user_id, module_id, graded))
+    await db.commit()
+    return graded
+
+# --- Transcripts ---
+async def get_transcript(db: AsyncSession, module_id: int, start=None, end=None):
+    result = await db.execute(crud.transcript_query(module_id, start, end))
+    return result.scalars().all()
+
+async def find_in_transcript(db: AsyncSession, module_id: int, phrase: str):
+    result = await db.execute(crud.transcript_phrase_query(module_id, phrase))
+    return result.scalars().all()
+
+# --- Comments ---
+async def get_comments_for_module(db: AsyncSession, module_id: int, page: PageParams):
+    result = await db.execute(crud.comments_query(module_id, page))
+    return make_page(result.scalars().all(), page, lambda c: [c.created_at, c.id])
+
+async def get_comment_threads(db: AsyncSession, module_id: int, page: PageParams):
+    result = await db.execute(crud.comment_threads_query(module_id, page))
+    return crud.build_comment_threads(result.scalars().all(), page)
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -6,20 +7,106 @@ import os
 # Default to a local postgres or overriden by env
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ranoson.db")
 
-connect_args = {}
-if "sqlite" in SQLALCHEMY_DATABASE_URL:
-    connect_args = {"check_same_thread": False}
+# Engine profiles, selected with DB_PROFILE (individual DB_* env vars override).
+# pool_size and max_overflow are the budget for the whole process: it is split
+# between the sync and async engines, DB_ASYNC_POOL_SHARE going to the async one.
+ENGINE_PROFILES = {
+    "default": {"pool_size": 5, "max_overflow": 10, "pool_timeout": 30, "pool_recycle": 1800},
+    "high_concurrency": {"pool_size": 20, "max_overflow": 40, "pool_timeout": 10, "pool_recycle": 900},
+    "minimal": {"pool_size": 2, "max_overflow": 0, "pool_timeout": 30, "pool_recycle": 3600},
+}
+
+ASYNC_POOL_SHARE = float(os.getenv("DB_ASYNC_POOL_SHARE", "0.5"))
+_SPLIT_KEYS = ("pool_size", "max_overflow")
+
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE_KB", "-20000")),  # negative = KiB
+}
+
+def _engine_options(url: str, engine: str = "sync") -> dict:
+    profile_name = os.getenv("DB_PROFILE", "default")
+    if profile_name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE '{profile_name}', expected one of {sorted(ENGINE_PROFILES)}")
+    profile = dict(ENGINE_PROFILES[profile_name])
+
+    for key in profile:
+        override = os.getenv(f"DB_{key.upper()}")
+        if override is not None:
+            profile[key] = int(override)
+    for key in _SPLIT_KEYS:
+        async_part = round(profile[key] * ASYNC_POOL_SHARE)
+        profile[key] = async_part if engine == "async" else profile[key] - async_part
+    profile["pool_size"] = max(1, profile["pool_size"])
+
+    options = {"pool_pre_ping": True, **profile}
+    if "sqlite" in url:
+        options["connect_args"] = {"check_same_thread": False}
+        options.pop("pool_pre_ping")  # local file, nothing to go stale
+        if ":memory:" in url or url.rstrip("/").endswith("sqlite:"):
+            # In-memory databases use a singleton pool; sizing does not apply
+            options = {"connect_args": options["connect_args"]}
+    return options
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(SQLALCHEMY_DATABASE_URL))
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args=connect_args
-)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# --- Async engine (asyncpg / aiosqlite) for the hot API paths ---
+def _async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if scheme.startswith("postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(SQLALCHEMY_DATABASE_URL))
+
+_async_options = _engine_options(SQLALCHEMY_DATABASE_URL, engine="async")
+_async_options.pop("connect_args", None)  # check_same_thread is meaningless for aiosqlite
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_async_options)
+if async_engine.dialect.name == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+def get_pool_status(bind=None) -> dict:
+    """Snapshot of connection pool usage for the given (or default) engine."""
+    bind = bind or engine
+    pool = bind.pool
+    stats = {
+        "dialect": bind.dialect.name,
+        "pool_class": type(pool).__name__,
+        "status": pool.status(),
+    }
+    for attr in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, attr, None)
+        if callable(fn):
+            stats[attr] = fn()
+    return stats
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
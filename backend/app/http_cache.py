@@ -0,0 +1,48 @@
+"""
+Conditional GET support: strong ETags built from version columns, and
+If-None-Match handling.
+
+Responses are marked `private, no-cache`, so browsers keep a copy but
+revalidate it on every use. An unchanged resource then costs one indexed
+version lookup and an empty 304.
+"""
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    return '"' + "-".join(str(p) for p in parts) + '"'
+
+
+def module_etag(module) -> str:
+    # Comment counters are part of the module payload but don't bump the version
+    return make_etag("module", module.id, module.version, module.comment_count, module.reply_count)
+
+
+def snapshot_etag(module_id: int, version: int) -> str:
+    # Snapshots are immutable, so the published version alone identifies the body
+    return make_etag("module", module_id, "p", version)
+
+
+def resource_etag(resource) -> str:
+    return make_etag("resource", resource.id, resource.version)
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2)
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -1,12 +1,19 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from .api import endpoints
-from app import database, models, auth
+from app import database, models, auth, crud, search, serialization, storage
+from app.compression import CompressApiResponses
+from app.attempt_log import attempt_log
+from app.analytics import rollup_job
+from app.storage import sweeper
+from app.scheduler import scheduler
+from app.pagination import InvalidCursor
 
 from fastapi.staticfiles import StaticFiles
 import os
 
-app = FastAPI(title="Ranoson Springs LMS", version="0.1.0")
+app = FastAPI(title="Ranoson Springs LMS", version="0.1.0", **serialization.fastapi_options())
 
 # Create static directory if it doesn't exist
 os.makedirs("static/videos", exist_ok=True)
@@ -25,77 +32,143 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(CompressApiResponses)
+
 app.include_router(endpoints.router, prefix="/api/v1")
 
 
+@app.exception_handler(auth.HashingOverloaded)
+async def _hashing_overloaded_handler(request: Request, exc: auth.HashingOverloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many sign-in requests, please retry shortly"},
+        headers={"Retry-After": "2"},
+    )
+
+
+@app.exception_handler(InvalidCursor)
+async def _invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Ranoson Springs LMS API"}
 
-# ...existing code...
-def _create_dev_user_if_missing():
+# Local development only (see README): these accounts have known passwords, one of them an admin
+SEED_DEV_USERS = os.getenv("SEED_DEV_USERS", "0") == "1"
+
+DEV_USERS = [
+    {"employee_code": "TEST001", "password": "test123", "is_registered": True, "role_id": None},
+    {"employee_code": "EMP002", "password": "user123", "is_registered": True, "role_id": 1},
+]
+
+
+def _create_dev_users_if_missing():
     db = database.SessionLocal()
     try:
-        # create or ensure a list of dev users exist
-        dev_users = [
-            {"employee_code": "TEST001", "password": "test123", "is_registered": True, "role_id": None},
-            {"employee_code": "EMP002", "password": "user123", "is_registered": True, "role_id": 1},  # regular user
-        ]
-
-        for udef in dev_users:
-            existing = db.query(models.User).filter(models.User.employee_code == udef["employee_code"]).first()
-            if not existing:
-                user = models.User(
-                    employee_code=udef["employee_code"],
-                    hashed_password=auth.get_password_hash(udef["password"]),
-                    is_registered=udef["is_registered"],
-                )
-                # set role_id if your model has it
-                if hasattr(user, "role_id") and udef.get("role_id") is not None:
-                    setattr(user, "role_id", udef["role_id"])
-                db.add(user)
-                db.commit()
-                db.refresh(user)
-                print(f"Created dev user: {udef['employee_code']} / {udef['password']}")
-            else:
-                print("Dev user already exists:", existing.employee_code)
-
-        # Debug: list users currently in DB (avoid accessing relationships)
-        users = db.query(models.User).all()
-        print("Users in DB:")
-        for u in users:
-            uid = getattr(u, "id", None)
-            code = getattr(u, "employee_code", "<no_code>")
-            role = getattr(u, "role_id", None)
-            registered = getattr(u, "is_registered", None)
-            hashed = getattr(u, "hashed_password", "") or ""
-            print(f" - id={uid} code={code} role_id={role} registered={registered} hashed_prefix={hashed[:24]}")
-
-        # Verify the test passwords against the stored hash (if helper available)
-        if hasattr(auth, "verify_password"):
-            for udef in dev_users:
-                try:
-                    row = db.query(models.User).filter(models.User.employee_code == udef["employee_code"]).first()
-                    ok = auth.verify_password(udef["password"], getattr(row, "hashed_password", ""))
-                    print(f"auth.verify_password('{udef['password']}', {udef['employee_code']}) =>", ok)
-                except Exception as e:
-                    print("Error verifying password for", udef["employee_code"], e)
-
-        # Print DB engine url for sanity
-        try:
-            engine = getattr(database, "engine", None)
-            if engine is not None:
-                print("Database engine url:", str(engine.url))
-        except Exception:
-            pass
-
+        codes = [u["employee_code"] for u in DEV_USERS]
+        existing = {code for (code,) in db.query(models.User.employee_code).filter(models.User.employee_code.in_(codes))}
+        for udef in DEV_USERS:
+            if udef["employee_code"] in existing:
+                continue
+            db.add(models.User(
+                employee_code=udef["employee_code"],
+                hashed_password=auth.get_password_hash(udef["password"]),
+                is_registered=udef["is_registered"],
+                role_id=udef["role_id"],
+            ))
+            print(f"Created dev user: {udef['employee_code']} / {udef['password']}")
+        db.commit()
     except Exception as e:
         db.rollback()
         print("Dev user creation error:", e)
     finally:
         db.close()
-# ...existing code...
+
+
+@app.on_event("startup")
+def _on_startup_create_dev_users():
+    if SEED_DEV_USERS:
+        _create_dev_users_if_missing()
+
+
+@app.on_event("startup")
+def _ensure_search_index():
+    search.ensure_index(database.engine)
+
+
+@app.on_event("startup")
+async def _start_attempt_log():
+    await attempt_log.start()
+
+
+@app.on_event("startup")
+async def _start_rollup_job():
+    rollup_job.start()
+
+
+@app.on_event("startup")
+async def _start_storage_sweeper():
+    sweeper.start()
+
+
+def _resume_pipeline_jobs():
+    # Modules whose job was queued or running when the last process stopped are
+    # still marked processing. Resubmit them at the default priority, since the
+    # original isn't stored; clear the flag on those whose upload is gone.
+    db = database.SessionLocal()
+    try:
+        resume = []
+        for module in crud.claim_stranded_modules(db):
+            video_path = storage.static_path(module.video_url)
+            if video_path and os.path.exists(video_path):
+                resume.append((module, video_path))
+            else:
+                print(f"⚠️ Module {module.id} was left processing but its video is missing; clearing the flag")
+                db.query(models.Module).filter(models.Module.id == module.id).update(
+                    {models.Module.is_processing: False}, synchronize_session=False
+                )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print("Pipeline resume error:", e)
+        return
+    finally:
+        db.close()
+    if not resume:
+        return
+    from app.api.tasks import process_video_task # keep the pipeline out of startup unless it's needed
+    for module, video_path in resume:
+        scheduler.submit(
+            process_video_task, module.id, video_path, module.description,
+            owner=module.created_by_id, label=f"module {module.id}",
+        )
+    print(f"Resubmitted {len(resume)} interrupted pipeline jobs")
+
 
 @app.on_event("startup")
-def _on_startup_create_dev_user():
-    _create_dev_user_if_missing()
\ No newline at end of file
+def _start_pipeline_scheduler():
+    scheduler.start()
+    _resume_pipeline_jobs()
+
+
+@app.on_event("shutdown")
+async def _stop_attempt_log():
+    # Final flush so a clean shutdown leaves nothing in the spool
+    await attempt_log.stop()
+
+
+@app.on_event("shutdown")
+async def _stop_rollup_job():
+    await rollup_job.stop()
+
+
+@app.on_event("shutdown")
+async def _stop_storage_sweeper():
+    await sweeper.stop()
+
+
+@app.on_event("shutdown")
+def _stop_pipeline_scheduler():
+    scheduler.stop()
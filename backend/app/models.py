@@ -1,8 +1,16 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text, Float, DateTime
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, JSON, LargeBinary, String, Text, Float, DateTime
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 
+# SQLite stores CURRENT_TIMESTAMP without fractional seconds; bind Python
+# datetimes the same way so keyset comparisons on server-defaulted columns match
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 class Role(Base):
     __tablename__ = "roles"
     
@@ -39,15 +47,44 @@ class Module(Base):
     # New fields for AI Course Generation
     objectives = Column(Text, nullable=True) # JSON or Markdown
     applications = Column(Text, nullable=True) # JSON or Markdown
-    quiz_data = Column(Text, nullable=True) # JSON string of quiz questions
     is_processing = Column(Boolean, default=False)
     
+    # Denormalized discussion counters, maintained by crud.create_comment
+    comment_count = Column(Integer, default=0, server_default="0", nullable=False) # all comments incl. replies
+    reply_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Bumped on every content change (crud.bump_module_version); feeds the ETag
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+    # Version learners see (crud.publish_module); NULL = never published, served live
+    published_version = Column(Integer, nullable=True)
+    
     steps = relationship("ModuleStep", back_populates="module", order_by="ModuleStep.order_index")
     progress = relationship("UserProgress", back_populates="module")
     comments = relationship("Comment", back_populates="module")
+    quiz_questions = relationship("QuizQuestion", back_populates="module", order_by="QuizQuestion.order_index")
+
+class ModuleSnapshot(Base):
+    """Gzipped learner view of a module at a published version; never updated in place."""
+    __tablename__ = "module_snapshots"
+
+    module_id = Column(Integer, ForeignKey("modules.id"), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    body = Column(LargeBinary, nullable=False) # gzip of the JSON response
+    size = Column(Integer, nullable=False) # uncompressed bytes
+    created_at = Column(Timestamp, server_default=func.now())
+
+class ModuleDraft(Base):
+    """Unpublished edits to a module (a ModuleCreate payload as JSON); applied to the live rows on publish."""
+    __tablename__ = "module_drafts"
+
+    module_id = Column(Integer, ForeignKey("modules.id"), primary_key=True)
+    body = Column(Text, nullable=False)
+    updated_at = Column(Timestamp, default=func.now(), onupdate=func.now())
 
 class ModuleStep(Base):
     __tablename__ = "module_steps"
+    __table_args__ = (
+        Index("ix_module_steps_module_order", "module_id", "order_index"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     module_id = Column(Integer, ForeignKey("modules.id"))
@@ -72,8 +109,33 @@ class AssignmentQuestion(Base):
     
     step = relationship("ModuleStep", back_populates="assignment")
 
+class QuizQuestion(Base):
+    __tablename__ = "quiz_questions"
+    __table_args__ = (
+        Index("ix_quiz_questions_module_order", "module_id", "order_index"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    module_id = Column(Integer, ForeignKey("modules.id"))
+    order_index = Column(Integer, default=0)
+    type = Column(String, default="mcq") # mcq, fill, numerical
+    question = Column(Text)
+    options = Column(JSON, nullable=True) # list of option strings (mcq only)
+    correct_answer = Column(Text)
+    tolerance = Column(Float, nullable=True) # numerical only
+    explanation = Column(Text, nullable=True)
+    module_index = Column(Integer, nullable=True) # step the question was generated from
+
+    module = relationship("Module", back_populates="quiz_questions")
+
 class UserProgress(Base):
     __tablename__ = "user_progress"
+    __table_args__ = (
+        # One progress row per assignment; also serves per-user lookups
+        Index("uq_user_progress_user_module", "user_id", "module_id", unique=True),
+        # Drives the analytics delta job (see analytics.py)
+        Index("ix_user_progress_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -81,24 +143,94 @@ class UserProgress(Base):
     current_step_index = Column(Integer, default=0)
     status = Column(String, default="Not Started") # "Not Started", "In Progress", "Completed", "Failed"
     score = Column(Float, default=0.0)
+    # SQL-expression default/onupdate so Core inserts and updates set it too;
+    # raw ON CONFLICT updates must set it themselves
+    updated_at = Column(Timestamp, default=func.now(), onupdate=func.now(), server_default=func.now())
     
     user = relationship("User", back_populates="progress")
     module = relationship("Module", back_populates="progress")
 
+class StepAttempt(Base):
+    # Append-only audit log of step submissions, written in batches by attempt_log
+    __tablename__ = "step_attempts"
+    __table_args__ = (
+        Index("ix_step_attempts_user_module", "user_id", "module_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    attempt_uuid = Column(String, unique=True, nullable=False) # assigned at submit time; makes spool replay idempotent
+    user_id = Column(Integer, ForeignKey("users.id"))
+    module_id = Column(Integer, ForeignKey("modules.id"))
+    step_id = Column(Integer) # no FK: history outlives steps removed by edits
+    step_index = Column(Integer)
+    value = Column(Text)
+    passed = Column(Boolean)
+    created_at = Column(Timestamp) # submission time, not insert time
+
+class TranscriptSegment(Base):
+    # One Whisper segment of a module's source video, kept so videos are never transcribed twice
+    __tablename__ = "transcript_segments"
+    __table_args__ = (
+        Index("ix_transcript_segments_module_start", "module_id", "start_time"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    module_id = Column(Integer, ForeignKey("modules.id"), nullable=False)
+    step_id = Column(Integer, nullable=True) # step covering this moment; no FK, steps get replaced by edits
+    start_time = Column(Float, nullable=False) # seconds into the source video
+    end_time = Column(Float, nullable=False)
+    text = Column(Text, nullable=False)
+
+# --- Analytics rollups (maintained by analytics.py, never written by request handlers) ---
+class ModuleRoleStats(Base):
+    __tablename__ = "module_role_stats"
+
+    module_id = Column(Integer, ForeignKey("modules.id"), primary_key=True)
+    role_id = Column(Integer, primary_key=True) # 0 = users without a role
+    assigned = Column(Integer, default=0, nullable=False)
+    not_started = Column(Integer, default=0, nullable=False)
+    in_progress = Column(Integer, default=0, nullable=False)
+    completed = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    score_sum = Column(Float, default=0.0, nullable=False) # over completed + failed, i.e. graded attempts
+    updated_at = Column(Timestamp, default=func.now(), onupdate=func.now())
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    assigned = Column(Integer, default=0, nullable=False)
+    not_started = Column(Integer, default=0, nullable=False)
+    in_progress = Column(Integer, default=0, nullable=False)
+    completed = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    score_sum = Column(Float, default=0.0, nullable=False)
+    updated_at = Column(Timestamp, default=func.now(), onupdate=func.now())
+
+class RollupState(Base):
+    __tablename__ = "rollup_state"
+
+    name = Column(String, primary_key=True)
+    watermark = Column(Timestamp, nullable=True) # user_progress.updated_at already folded in
+
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        # Serves per-module thread lookups and keyset pagination on created_at
+        Index("ix_comments_module_parent_created", "module_id", "parent_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     module_id = Column(Integer, ForeignKey("modules.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
     text = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     parent_id = Column(Integer, ForeignKey("comments.id"), nullable=True)
     
     module = relationship("Module", back_populates="comments")
     user = relationship("User", back_populates="comments")
-    replies = relationship("Comment", back_populates="parent", remote_side=[id])
-    parent = relationship("Comment", back_populates="replies", remote_side=[parent_id])
+    replies = relationship("Comment", back_populates="parent")
+    parent = relationship("Comment", back_populates="replies", remote_side=[id])
 
 class LearningResource(Base):
     __tablename__ = "learning_resources"
@@ -110,3 +242,4 @@ class LearningResource(Base):
     content = Column(Text) # Markdown content or URL
     image_url = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    version = Column(Integer, default=1, server_default="1", nullable=False)
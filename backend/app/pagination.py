@@ -0,0 +1,92 @@
+"""
+Keyset (cursor) pagination shared by all list endpoints.
+
+A cursor is the sort-key values of the last row on a page, JSON-encoded and
+base64url'd. Clients should treat it as an opaque token. Pages are selected
+with a `WHERE (k1, k2) > (:v1, :v2)` style predicate over indexed sort keys, so
+page N costs the same as page 1.
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def _object_hook(obj):
+    if "$dt" in obj:
+        return datetime.fromisoformat(obj["$dt"])
+    return obj
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps(list(values), default=_default, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()), object_hook=_object_hook)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if not isinstance(values, list):
+        raise InvalidCursor("Malformed cursor")
+    return values
+
+
+# --- Keyset pagination ---
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+@dataclass
+class PageParams:
+    after: Optional[list] = None
+    limit: int = DEFAULT_PAGE_SIZE
+
+
+def page_params(cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> PageParams:
+    """FastAPI dependency: ?cursor=...&limit=..."""
+    return PageParams(after=decode_cursor(cursor) if cursor else None, limit=max(1, min(limit, MAX_PAGE_SIZE)))
+
+
+def keyset(stmt, columns, page: PageParams, descending: bool = False):
+    """
+    Apply a keyset page to `stmt`, ordered by `columns` (the last one must be
+    unique, normally the primary key). Fetches one extra row so make_page can
+    tell whether another page exists.
+    """
+    if page.after is not None:
+        if len(page.after) != len(columns):
+            raise InvalidCursor("Cursor does not match this listing")
+        clauses = []
+        for i, column in enumerate(columns):
+            value = page.after[i]
+            bound = column < value if descending else column > value
+            clauses.append(and_(*[columns[j] == page.after[j] for j in range(i)], bound))
+        stmt = stmt.where(or_(*clauses))
+    order = [c.desc() if descending else c.asc() for c in columns]
+    return stmt.order_by(*order).limit(page.limit + 1)
+
+
+def make_page(rows, page: PageParams, key) -> dict:
+    """Trim the look-ahead row and build {items, next_cursor}; `key(row)` returns the sort values."""
+    rows = list(rows)
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_cursor(key(rows[-1]))
+    return {"items": rows, "next_cursor": next_cursor}
@@ -0,0 +1,117 @@
+"""
+TTL cache of authenticated principals, keyed by token subject (employee code).
+
+get_current_user used to hit the database on every authenticated request even
+though users and roles almost never change. Resolved principals are now kept in
+an in-process LRU/TTL map. If PRINCIPAL_CACHE_REDIS_URL is set, Redis is used as
+a second tier shared by all workers.
+
+The API only changes an existing user's principal at registration, which
+calls invalidate_user(). Users and roles edited outside the API (seed scripts,
+SQL) show up within PRINCIPAL_CACHE_SHARED_TTL seconds, or straight away after
+POST /admin/cache/principals/clear. With several workers, another worker's
+in-process entry can stay stale for at most PRINCIPAL_CACHE_LOCAL_TTL seconds
+after either.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from . import schemas
+
+LOCAL_TTL = float(os.getenv("PRINCIPAL_CACHE_LOCAL_TTL", "30"))
+SHARED_TTL = int(os.getenv("PRINCIPAL_CACHE_SHARED_TTL", "60"))
+MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("PRINCIPAL_CACHE_REDIS_URL")
+
+_KEY_PREFIX = "ranoson:principal:"
+
+
+class PrincipalCache:
+    def __init__(self, local_ttl: float = LOCAL_TTL, max_entries: int = MAX_ENTRIES,
+                 redis_url: Optional[str] = REDIS_URL, shared_ttl: int = SHARED_TTL):
+        self.local_ttl = local_ttl
+        self.max_entries = max_entries
+        self.shared_ttl = shared_ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        if redis_url:
+            try:
+                import redis.asyncio as aioredis
+            except ImportError as e:
+                raise RuntimeError("PRINCIPAL_CACHE_REDIS_URL is set but the 'redis' package is not installed") from e
+            self._redis = aioredis.from_url(redis_url)
+        self.hits = 0
+        self.misses = 0
+
+    # --- local tier ---
+    def _get_local(self, key: str) -> Optional[schemas.UserMe]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def _set_local(self, key: str, principal: schemas.UserMe):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.local_ttl, principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # --- public API ---
+    async def get(self, key: str) -> Optional[schemas.UserMe]:
+        principal = self._get_local(key)
+        if principal is None and self._redis is not None:
+            raw = await self._redis.get(_KEY_PREFIX + key)
+            if raw is not None:
+                principal = schemas.UserMe.model_validate_json(raw)
+                self._set_local(key, principal)
+        if principal is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return principal
+
+    async def set(self, key: str, principal: schemas.UserMe):
+        self._set_local(key, principal)
+        if self._redis is not None:
+            await self._redis.set(_KEY_PREFIX + key, principal.model_dump_json(), ex=self.shared_ttl)
+
+    async def invalidate_user(self, employee_code: str):
+        with self._lock:
+            self._entries.pop(employee_code, None)
+        if self._redis is not None:
+            await self._redis.delete(_KEY_PREFIX + employee_code)
+
+    async def clear(self) -> int:
+        """Drop every cached principal (this worker's and the shared tier); returns the local entries dropped."""
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+        if self._redis is not None:
+            keys = [key async for key in self._redis.scan_iter(match=_KEY_PREFIX + "*", count=500)]
+            for i in range(0, len(keys), 500):
+                await self._redis.delete(*keys[i:i + 500])
+        return dropped
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "local_ttl": self.local_ttl,
+            "shared_ttl": self.shared_ttl,
+            "shared_backend": "redis" if self._redis is not None else None,
+        }
+
+
+principal_cache = PrincipalCache()
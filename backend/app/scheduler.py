@@ -0,0 +1,261 @@
+"""
+Scheduling for video processing jobs.
+
+Processing used to start as a FastAPI background task the moment a module was
+created, so every upload competed equally and a batch of uploads ran all at
+once on the cores the API needs. Jobs now go through one scheduler:
+
+  - Jobs: PIPELINE_WORKERS threads take jobs from a priority queue. The most
+    urgent priority with waiting jobs goes first. Within a priority the
+    creator with the fewest running jobs (then the one served longest ago)
+    goes next, so one person's batch upload can't hold back everyone else.
+    Each creator's own jobs run in submission order.
+  - Slots: inside a job each stage takes a slot from its own pool: encode
+    (write_videofile), decode (audio and frame extraction) and llm (Groq
+    calls). The pools are sized separately. Encode and decode default to a
+    quarter of the cores each, and ffmpeg gets ENCODE_THREADS threads per
+    encode, so the CPU-bound stages leave the API room. Waiting stages are
+    granted in priority order, so an urgent job's encode jumps a batch job's.
+  - Worker threads run at PIPELINE_NICE. On Linux, niceness is per-thread and
+    the ffmpeg processes they start inherit it.
+
+Jobs don't survive a restart: queued ones are dropped on stop() and running
+ones die with the process. Their modules are still marked is_processing, so
+the API resubmits them at startup.
+
+stats() reports queue depth, running jobs, queue waits per priority and slot
+waits per pool; it is exposed as GET /admin/pipeline/scheduler.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+PRIORITIES = {"urgent": 0, "high": 1, "normal": 2, "low": 3}
+DEFAULT_PRIORITY = "normal"
+
+_CPUS = os.cpu_count() or 2
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "2"))
+PIPELINE_NICE = int(os.getenv("PIPELINE_NICE", "10"))
+SLOT_SIZES = {
+    "encode": int(os.getenv("PIPELINE_ENCODE_SLOTS", str(max(1, _CPUS // 4)))),
+    "decode": int(os.getenv("PIPELINE_DECODE_SLOTS", str(max(1, _CPUS // 4)))),
+    "llm": int(os.getenv("PIPELINE_LLM_SLOTS", "4")),
+}
+# Threads per ffmpeg encode; with every encode slot busy the encoders use about half the cores
+ENCODE_THREADS = int(os.getenv("PIPELINE_ENCODE_THREADS", str(max(1, _CPUS // 2 // SLOT_SIZES["encode"]))))
+
+_local = threading.local()
+
+
+class _Waits:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_wait_ms": round(self.total / self.count * 1000, 1) if self.count else 0.0,
+            "max_wait_ms": round(self.max * 1000, 1),
+        }
+
+
+class SlotPool:
+    """A bounded pool of slots that hands free slots to waiters in (priority, arrival) order."""
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = max(1, size)
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self._waiting = [] # heap of (priority, ticket)
+        self._tickets = itertools.count()
+        self.waits = _Waits()
+
+    def acquire(self, priority: int):
+        ticket = (priority, next(self._tickets))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            while self._in_use >= self.size or self._waiting[0] != ticket:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            self._in_use += 1
+            self.waits.add(time.monotonic() - started)
+            # The next waiter may fit as well
+            self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            if self._in_use <= 0:
+                raise ValueError(f"{self.name} slot released too many times")
+            self._in_use -= 1
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"size": self.size, "in_use": self._in_use, "waiting": len(self._waiting), **self.waits.stats()}
+
+
+class _Job:
+    def __init__(self, job_id: int, fn, args, priority: str, owner, label):
+        self.id = job_id
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.owner = owner
+        self.label = label
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+
+
+class PipelineScheduler:
+    def __init__(self, workers: int = PIPELINE_WORKERS, slots: dict = None):
+        self.workers = max(1, workers)
+        self.pools = {name: SlotPool(name, size) for name, size in (slots or SLOT_SIZES).items()}
+        self._cond = threading.Condition()
+        self._queues = {level: {} for level in PRIORITIES.values()} # level -> owner -> deque of jobs
+        self._queued = 0
+        self._running = {}
+        self._running_by_owner = Counter()
+        self._last_served = {}
+        self._serial = itertools.count(1)
+        self._threads = []
+        self._stopping = False
+        self.queue_waits = {name: _Waits() for name in PRIORITIES}
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    # --- Jobs ---
+    def submit(self, fn, *args, priority: str = DEFAULT_PRIORITY, owner=None, label: str = None) -> int:
+        """Queue fn(*args) to run on a worker thread; returns the job id."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}")
+        self.start()
+        with self._cond:
+            job = _Job(next(self._serial), fn, args, priority, owner, label)
+            self._queues[PRIORITIES[priority]].setdefault(owner, deque()).append(job)
+            self._queued += 1
+            self.submitted += 1
+            self._cond.notify()
+        return job.id
+
+    def _next_job(self):
+        for level in sorted(self._queues):
+            owners = self._queues[level]
+            if not owners:
+                continue
+            owner = min(owners, key=lambda o: (self._running_by_owner[o], self._last_served.get(o, 0)))
+            jobs = owners[owner]
+            job = jobs.popleft()
+            if not jobs:
+                del owners[owner]
+            self._queued -= 1
+            self._last_served[owner] = job.id
+            return job
+        return None
+
+    def _lower_priority(self):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PIPELINE_NICE)
+        except (AttributeError, OSError):
+            pass
+
+    def _work(self):
+        self._lower_priority()
+        while True:
+            with self._cond:
+                while not self._stopping and not self._queued:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                job = self._next_job()
+                job.started_at = time.monotonic()
+                self.queue_waits[job.priority].add(job.started_at - job.submitted_at)
+                self._running[job.id] = job
+                self._running_by_owner[job.owner] += 1
+            _local.priority = PRIORITIES[job.priority]
+            failed = False
+            try:
+                job.fn(*job.args)
+            except Exception as e:
+                failed = True
+                print(f"⚠️ Pipeline job {job.label or job.id} failed: {e}")
+            finally:
+                with self._cond:
+                    del self._running[job.id]
+                    self._running_by_owner[job.owner] -= 1
+                    if not self._running_by_owner[job.owner]:
+                        del self._running_by_owner[job.owner]
+                    self.completed += 1
+                    self.failed += failed
+
+    def start(self):
+        with self._cond:
+            # Workers still finishing a job after stop() carry on once the flag is cleared
+            self._stopping = False
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for i in range(len(self._threads), self.workers):
+                thread = threading.Thread(target=self._work, name=f"pipeline-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        # Running jobs finish if the process outlives them; queued ones are dropped.
+        # Either way their modules stay marked processing and are resubmitted on the
+        # next startup (main._resume_pipeline_jobs).
+        with self._cond:
+            self._stopping = True
+            if self._queued:
+                labels = [job.label or job.id for owners in self._queues.values() for jobs in owners.values() for job in jobs]
+                print(f"⚠️ Leaving {self._queued} queued pipeline jobs for the next startup: {', '.join(map(str, labels))}")
+            self._cond.notify_all()
+
+    # --- Stage slots ---
+    @contextmanager
+    def slot(self, stage: str):
+        """Hold a slot of the given stage pool; callers outside a job wait at normal priority."""
+        pool = self.pools[stage]
+        pool.acquire(getattr(_local, "priority", PRIORITIES[DEFAULT_PRIORITY]))
+        try:
+            yield
+        finally:
+            pool.release()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._cond:
+            queued = {name: sum(len(jobs) for jobs in self._queues[level].values()) for name, level in PRIORITIES.items()}
+            queued_by_owner = Counter()
+            for owners in self._queues.values():
+                for owner, jobs in owners.items():
+                    queued_by_owner[owner] += len(jobs)
+            running = [
+                {"job_id": job.id, "label": job.label, "priority": job.priority, "owner": job.owner,
+                 "running_s": round(now - job.started_at, 1)}
+                for job in self._running.values()
+            ]
+            summary = {
+                "workers": self.workers, "queue_depth": self._queued, "queued": queued,
+                "queued_by_owner": dict(queued_by_owner), "running": running,
+                "submitted": self.submitted, "completed": self.completed, "failed": self.failed,
+                "queue_waits": {name: waits.stats() for name, waits in self.queue_waits.items()},
+            }
+        summary["slots"] = {name: pool.stats() for name, pool in self.pools.items()}
+        summary["encode_threads"] = ENCODE_THREADS
+        return summary
+
+
+scheduler = PipelineScheduler()
+slot = scheduler.slot
@@ -1,7 +1,14 @@
 from pydantic import BaseModel
-from typing import List, Optional, Union
+from typing import Generic, List, Literal, Optional, TypeVar, Union
 from datetime import datetime
 
+T = TypeVar("T")
+
+# --- Pagination ---
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
 # --- Role ---
 class RoleBase(BaseModel):
     name: str
@@ -28,6 +35,9 @@ class Comment(CommentBase):
     class Config:
         from_attributes = True
 
+class CommentThread(Comment):
+    replies: List["CommentThread"] = []
+
 # --- Assignment ---
 class AssignmentQuestionBase(BaseModel):
     question_text: str
@@ -44,6 +54,46 @@ class AssignmentQuestion(AssignmentQuestionBase):
     class Config:
         from_attributes = True
 
+# --- Quiz ---
+class QuizQuestionBase(BaseModel):
+    question: str
+    type: str = "mcq" # mcq, fill, numerical
+    options: Optional[List[str]] = None
+    module_index: Optional[int] = None
+
+class QuizQuestionCreate(QuizQuestionBase):
+    correct_answer: str
+    tolerance: Optional[float] = None
+    explanation: Optional[str] = None
+
+class QuizQuestion(QuizQuestionBase):
+    # Learner view: never carries answers
+    id: int
+    class Config:
+        from_attributes = True
+
+class QuizQuestionWithAnswer(QuizQuestionCreate):
+    id: int
+    class Config:
+        from_attributes = True
+
+class QuizAnswer(BaseModel):
+    question_id: int
+    value: str
+
+class QuizSubmission(BaseModel):
+    answers: List[QuizAnswer]
+
+class QuizAnswerResult(BaseModel):
+    question_id: int
+    correct: bool
+    score: float # 0..1, partial credit for numerical answers
+
+class QuizResult(BaseModel):
+    score: float # percentage, also stored on UserProgress.score
+    passed: bool
+    results: List[QuizAnswerResult]
+
 # --- Module Steps ---
 class ModuleStepBase(BaseModel):
     title: str
@@ -53,6 +103,7 @@ class ModuleStepBase(BaseModel):
     order_index: int
 
 class ModuleStepCreate(ModuleStepBase):
+    id: Optional[int] = None  # set when updating an existing step
     assignment: Optional[AssignmentQuestionCreate] = None
 
 class ModuleStep(ModuleStepBase):
@@ -62,6 +113,17 @@ class ModuleStep(ModuleStepBase):
     class Config:
         from_attributes = True
 
+# --- Transcripts ---
+class TranscriptSegment(BaseModel):
+    id: int
+    module_id: int
+    step_id: Optional[int] = None
+    start_time: float
+    end_time: float
+    text: str
+    class Config:
+        from_attributes = True
+
 # --- Modules ---
 class ModuleBase(BaseModel):
     title: str
@@ -72,7 +134,8 @@ class ModuleCreate(ModuleBase):
     steps: List[ModuleStepCreate] = []
     objectives: Optional[str] = None
     applications: Optional[str] = None
-    quiz_data: Optional[str] = None
+    quiz: Optional[List[QuizQuestionCreate]] = None # replaces the whole quiz when sent
+    priority: Literal["urgent", "high", "normal", "low"] = "normal" # queue priority when the video is processed
 
 class Module(ModuleBase):
     id: int
@@ -82,12 +145,44 @@ class Module(ModuleBase):
     # New fields
     objectives: Optional[str] = None
     applications: Optional[str] = None
-    quiz_data: Optional[str] = None
     is_processing: bool = False
+    comment_count: int = 0
+    reply_count: int = 0
+    version: int = 1
+    published_version: Optional[int] = None
     
     class Config:
         from_attributes = True
 
+class ModuleDraft(ModuleBase):
+    # Edit-page view: pending edits over the live module; carries quiz answers, so admins only
+    id: int
+    steps: List[ModuleStepCreate] = []
+    objectives: Optional[str] = None
+    applications: Optional[str] = None
+    quiz: List[QuizQuestionCreate] = []
+    is_processing: bool = False
+    version: int = 1
+    published_version: Optional[int] = None
+    has_draft: bool = False
+
+class ModulePublished(BaseModel):
+    module_id: int
+    version: int
+    size: int
+    compressed_size: int
+
+class ModuleSummary(ModuleBase):
+    id: int
+    created_by_id: Optional[int] = None
+    is_processing: bool = False
+    step_count: int = 0
+    comment_count: int = 0
+    thumbnail_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
 # --- User Progress ---
 class UserProgressBase(BaseModel):
     module_id: Optional[int] = None
@@ -110,6 +205,18 @@ class SubmissionResult(BaseModel):
     message: str
     correct_value: Optional[str] = None
 
+class StepAttempt(BaseModel):
+    id: int
+    user_id: int
+    module_id: int
+    step_id: int
+    step_index: int
+    value: str
+    passed: bool
+    created_at: datetime
+    class Config:
+        from_attributes = True
+
 # --- User ---
 class UserBase(BaseModel):
     employee_code: str
@@ -141,6 +248,16 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class UserImportError(BaseModel):
+    row: int
+    employee_code: Optional[str] = None
+    error: str
+
+class UserImportResult(BaseModel):
+    total_rows: int = 0
+    created: int = 0
+    errors: List[UserImportError] = []
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -159,12 +276,19 @@ class LearningResourceCreate(LearningResourceBase):
 class LearningResource(LearningResourceBase):
     id: int
     created_at: datetime
+    version: int = 1
     class Config:
         from_attributes = True
 
-# --- Improved Progress Schemas ---
-class UserProgressWithModule(UserProgress):
-    module: Optional[Module] = None
+# --- Learner Dashboard ---
+class AssignmentSummary(BaseModel):
+    module_id: int
+    title: str
+    status: str
+    current_step_index: int
+    total_steps: int = 0
+    score: float = 0.0
+
     class Config:
         from_attributes = True
 
@@ -172,7 +296,64 @@ class AssignModuleRequest(BaseModel):
     user_id: int
     module_id: int
 
-class UserMe(User):
-    progress: List[UserProgressWithModule] = []
+class BulkAssignRequest(BaseModel):
+    module_ids: List[int]
+    user_ids: List[int] = []
+    role_ids: List[int] = []
+
+class BulkAssignResult(BaseModel):
+    matched: int
+    assigned: int
+    already_assigned: int
+
+class UserMe(UserBase):
+    # Identity only: /auth/me is hit on every page load, keep it flat
+    id: int
+    role_id: Optional[int] = None
+    is_active: bool
+    is_registered: bool
+    role: Optional[Role] = None
+
     class Config:
         from_attributes = True
+
+# --- Analytics ---
+class TrainingStats(BaseModel):
+    assigned: int = 0
+    not_started: int = 0
+    in_progress: int = 0
+    completed: int = 0
+    failed: int = 0
+    completion_rate: float = 0.0 # percent of assigned
+    avg_score: Optional[float] = None # over graded (completed/failed) assignments
+
+class ModuleStats(TrainingStats):
+    module_id: int
+    title: Optional[str] = None
+    role_id: Optional[int] = None # 0 = users without a role
+
+class UserStats(TrainingStats):
+    user_id: int
+    employee_code: str
+
+class AnalyticsRefreshResult(BaseModel):
+    full: bool
+    module_roles: int
+    users: int
+    watermark: Optional[datetime] = None
+
+# --- Search ---
+class SearchResult(BaseModel):
+    kind: str # module, step, transcript, resource
+    ref_id: int
+    module_id: Optional[int] = None
+    title: str
+    snippet: str # matched text with <mark></mark> around hits
+    score: float
+
+class SemanticResult(BaseModel):
+    kind: str # module, step, resource
+    ref_id: int
+    module_id: Optional[int] = None
+    title: Optional[str] = None
+    score: float # cosine similarity
@@ -0,0 +1,209 @@
+"""
+Full-text search over modules, steps, transcripts and learning resources.
+
+Every searchable thing is one document (kind, ref_id, module_id, title, body)
+in a dialect-specific index:
+  - SQLite: an FTS5 virtual table, ranked with bm25() and highlighted with snippet()
+  - Postgres: a table with a stored, weighted tsvector column under a GIN index,
+    ranked with ts_rank_cd() and highlighted with ts_headline()
+
+Neither index can be declared through the ORM models. It is created alongside
+metadata.create_all() and by ensure_index() at startup, which also fills it
+when it's empty. After that it is kept current
+incrementally: the write paths call index_module / index_resource /
+index_transcript / remove_module in the same transaction as the change.
+POST /admin/search/rebuild recreates it from scratch.
+"""
+import re
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import Base, SessionLocal
+
+KINDS = ("module", "step", "transcript", "resource")
+MAX_RESULTS = 50
+HIGHLIGHT = ("<mark>", "</mark>")
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+_SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        kind UNINDEXED, ref_id UNINDEXED, module_id UNINDEXED, title, body,
+        tokenize = 'porter unicode61'
+    )""",
+]
+
+_POSTGRES_DDL = [
+    """CREATE TABLE IF NOT EXISTS search_index (
+        kind varchar(16) NOT NULL,
+        ref_id integer NOT NULL,
+        module_id integer,
+        title text NOT NULL DEFAULT '',
+        body text NOT NULL DEFAULT '',
+        tsv tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', body), 'B')
+        ) STORED,
+        PRIMARY KEY (kind, ref_id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_search_index_tsv ON search_index USING gin (tsv)",
+    "CREATE INDEX IF NOT EXISTS ix_search_index_module ON search_index (module_id)",
+]
+
+
+def _dialect(db) -> str:
+    name = db.get_bind().dialect.name
+    if name not in ("sqlite", "postgresql"):
+        raise NotImplementedError(f"Full-text search is not supported on {name}")
+    return name
+
+
+def _join(*parts) -> str:
+    return "\n\n".join(p for p in parts if p)
+
+
+# --- Maintenance ---
+def _put(db: Session, kind: str, ref_id: int, module_id, title, body):
+    _delete(db, "kind = :kind AND ref_id = :ref_id", kind=kind, ref_id=ref_id)
+    db.execute(
+        text("INSERT INTO search_index (kind, ref_id, module_id, title, body) VALUES (:kind, :ref_id, :module_id, :title, :body)"),
+        {"kind": kind, "ref_id": ref_id, "module_id": module_id, "title": title or "", "body": body or ""},
+    )
+
+
+def _delete(db: Session, where: str, **params):
+    db.execute(text(f"DELETE FROM search_index WHERE {where}"), params)
+
+
+def index_module(db: Session, module_id: int):
+    """(Re)index a module and its steps; the caller commits. The transcript is left alone."""
+    _delete(db, "module_id = :module_id AND kind IN ('module', 'step')", module_id=module_id)
+    module = db.get(models.Module, module_id)
+    if module is None:
+        return
+    _put(db, "module", module.id, module.id, module.title,
+         _join(module.description, module.objectives, module.applications))
+    steps = db.query(models.ModuleStep.id, models.ModuleStep.title, models.ModuleStep.content).filter(
+        models.ModuleStep.module_id == module_id
+    )
+    for step_id, title, content in steps:
+        _put(db, "step", step_id, module_id, title, content)
+
+
+def index_transcript(db: Session, module_id: int):
+    """Index a module's stored transcript segments as one document; the caller commits."""
+    _delete(db, "kind = 'transcript' AND ref_id = :ref_id", ref_id=module_id)
+    segments = db.query(models.TranscriptSegment.text).filter(
+        models.TranscriptSegment.module_id == module_id
+    ).order_by(models.TranscriptSegment.start_time)
+    transcript = " ".join(text for (text,) in segments)
+    if transcript:
+        title = db.query(models.Module.title).filter(models.Module.id == module_id).scalar()
+        _put(db, "transcript", module_id, module_id, title, transcript)
+
+
+def index_resource(db: Session, resource_id: int):
+    _delete(db, "kind = 'resource' AND ref_id = :ref_id", ref_id=resource_id)
+    resource = db.get(models.LearningResource, resource_id)
+    if resource is not None:
+        _put(db, "resource", resource.id, None, resource.title, _join(resource.description, resource.content))
+
+
+def remove_module(db: Session, module_id: int):
+    _delete(db, "module_id = :module_id", module_id=module_id)
+
+
+def _create(conn):
+    ddl = {"sqlite": _SQLITE_DDL, "postgresql": _POSTGRES_DDL}.get(conn.dialect.name)
+    if ddl is None:
+        print(f"⚠️ Full-text search is not supported on {conn.dialect.name}; /search is disabled")
+        return False
+    for statement in ddl:
+        conn.execute(text(statement))
+    return True
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_with_tables(target, connection, **kw):
+    # Databases set up with metadata.create_all (scripts, tests) get the index too
+    _create(connection)
+
+
+def ensure_index(bind) -> bool:
+    """Create the index if it's missing and fill it if it's empty; returns True if it was built."""
+    with bind.begin() as conn:
+        if not _create(conn):
+            return False
+        if conn.execute(text("SELECT 1 FROM search_index LIMIT 1")).first():
+            return False
+    db = SessionLocal(bind=bind)
+    try:
+        counts = rebuild(db)
+    finally:
+        db.close()
+    print(f"Built search index: {counts}")
+    return True
+
+
+def rebuild(db: Session) -> dict:
+    """Re-derive every document from the source tables."""
+    _delete(db, "1 = 1")
+    for (module_id,) in db.query(models.Module.id):
+        index_module(db, module_id)
+    for (module_id,) in db.query(models.TranscriptSegment.module_id).distinct():
+        index_transcript(db, module_id)
+    for (resource_id,) in db.query(models.LearningResource.id):
+        index_resource(db, resource_id)
+    db.commit()
+    rows = db.execute(text("SELECT kind, count(*) FROM search_index GROUP BY kind")).all()
+    return {kind: 0 for kind in KINDS} | {kind: count for kind, count in rows}
+
+
+# --- Queries ---
+def _fts5_query(q: str) -> str:
+    # Quote every token so user input can't use FTS5 syntax; the last one also matches as a prefix
+    tokens = _TOKEN.findall(q)
+    if not tokens:
+        return ""
+    return " ".join(f'"{t}"' for t in tokens) + "*"
+
+
+def search(db: Session, q: str, kinds=None, limit: int = 20) -> list:
+    """Ranked documents matching `q`, best first, with the matching text highlighted."""
+    limit = max(1, min(limit, MAX_RESULTS))
+    kinds = [k for k in (kinds or KINDS) if k in KINDS]
+    kind_filter = "kind IN (" + ", ".join(f":k{i}" for i in range(len(kinds))) + ")"
+    params = {f"k{i}": k for i, k in enumerate(kinds)} | {"limit": limit}
+    start, stop = HIGHLIGHT
+
+    if _dialect(db) == "sqlite":
+        match = _fts5_query(q)
+        if not match or not kinds:
+            return []
+        # bm25 weights: title matches count 5x body matches; lower is better
+        stmt = text(f"""
+            SELECT kind, ref_id, module_id, title,
+                   snippet(search_index, -1, :start, :stop, '…', 16) AS snippet,
+                   -bm25(search_index, 0, 0, 0, 5.0, 1.0) AS score
+            FROM search_index
+            WHERE search_index MATCH :match AND {kind_filter}
+            ORDER BY bm25(search_index, 0, 0, 0, 5.0, 1.0)
+            LIMIT :limit
+        """)
+        params |= {"match": match, "start": start, "stop": stop}
+    else:
+        if not q.strip() or not kinds:
+            return []
+        stmt = text(f"""
+            SELECT kind, ref_id, module_id, title,
+                   ts_headline('english', body, query, :options) AS snippet,
+                   ts_rank_cd(tsv, query) AS score
+            FROM search_index, websearch_to_tsquery('english', :q) AS query
+            WHERE tsv @@ query AND {kind_filter}
+            ORDER BY score DESC
+            LIMIT :limit
+        """)
+        params |= {"q": q, "options": f"StartSel={start}, StopSel={stop}, MaxWords=32, MinWords=12, MaxFragments=1"}
+
+    return [dict(r) for r in db.execute(stmt, params).mappings()]
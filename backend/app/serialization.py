@@ -0,0 +1,71 @@
+"""
+JSON serialization for API responses.
+
+Recent FastAPI versions serialize straight to JSON bytes in pydantic-core when
+a response model is declared. Setting a custom default_response_class turns
+that fast path off. Older versions build a dict and json.dumps it, so for them
+we switch to orjson when it is installed.
+
+The largest payloads (Module with every step's notes, and UserMe, which is
+fetched on every page load) use precompiled TypeAdapters through
+json_response(). That validates straight from ORM attributes and dumps to
+bytes in one pass, whatever the FastAPI version. Published module snapshots are stored already
+gzipped and go out through gzipped_json_response() without being re-encoded.
+"""
+import gzip
+import inspect
+
+from fastapi import Request, Response
+from fastapi import routing
+from pydantic import TypeAdapter
+
+from . import schemas
+
+try:
+    import orjson
+except ImportError: # optional
+    orjson = None
+
+module_adapter = TypeAdapter(schemas.Module)
+user_me_adapter = TypeAdapter(schemas.UserMe)
+
+
+def _fastapi_dumps_json_natively() -> bool:
+    return "dump_json" in inspect.signature(routing.serialize_response).parameters
+
+
+def fastapi_options() -> dict:
+    """Extra FastAPI() kwargs: orjson as the default response class where it helps."""
+    if orjson is None or _fastapi_dumps_json_natively():
+        return {}
+    from fastapi.responses import ORJSONResponse
+    return {"default_response_class": ORJSONResponse}
+
+
+def json_response(adapter: TypeAdapter, obj, status_code: int = 200) -> Response:
+    """Serialize `obj` (ORM object or model) with a precompiled adapter, skipping FastAPI's response_model pass."""
+    body = adapter.dump_json(adapter.validate_python(obj, from_attributes=True))
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+
+def accepts_gzip(request: Request) -> bool:
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            params = params.strip().lower()
+            try:
+                return float(params[2:]) > 0 if params.startswith("q=") else True
+            except ValueError:
+                return True
+    return False
+
+
+def gzipped_json_response(request: Request, body: bytes) -> Response:
+    """Serve a pre-gzipped JSON body as-is to clients that accept gzip, inflated for the rest."""
+    headers = {"Vary": "Accept-Encoding"}
+    if accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return Response(content=body, media_type="application/json", headers=headers)
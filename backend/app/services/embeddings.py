@@ -0,0 +1,365 @@
+"""
+Local vector index for "related modules" and semantic lookup.
+
+Modules, steps and learning resources are embedded on the CPU and held in
+one float32 matrix, with a row per item and unit-length rows. A query is a
+single matrix-vector product followed by argpartition for the top k. Tens of
+thousands of rows answer in a few milliseconds, with no external vector
+database.
+
+Embedders:
+  - HashingEmbedder (default): unigrams and bigrams hashed into EMBEDDING_DIM
+    signed buckets, sublinear TF, and an IDF fitted over the corpus at rebuild
+    time. No model download and no extra dependencies.
+  - A sentence-transformers model, when EMBEDDING_MODEL names one and the
+    package is installed.
+
+On disk (EMBEDDINGS_DIR): vectors.npy is memory-mapped on first use (this
+module, and numpy with it, is only imported by the handlers and tasks that
+need it, so API startup pays for neither).
+vectors.json holds the embedder name, its IDF and one (kind, ref_id,
+module_id, title) entry per row. Updates replace an item's rows in memory and
+rewrite both files atomically. Writes are rare (pipeline runs and edits),
+reads are constant.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from .. import models
+
+EMBEDDINGS_DIR = os.getenv("EMBEDDINGS_DIR", "vectors")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "512"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL") # e.g. sentence-transformers/all-MiniLM-L6-v2
+KINDS = ("module", "step", "resource")
+MAX_RESULTS = 50
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_MARKDOWN = re.compile(r"[#*_`>\[\]()!|-]+")
+
+
+def _join(*parts) -> str:
+    return "\n".join(p for p in parts if p)
+
+
+# --- Embedders ---
+class HashingEmbedder:
+    name = "hashing-tfidf"
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+
+    def _features(self, text: str) -> Counter:
+        tokens = _TOKEN.findall(_MARKDOWN.sub(" ", text or "").lower())
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return Counter(grams)
+
+    def _bucket(self, gram: str):
+        h = zlib.crc32(gram.encode("utf-8"))
+        return h % self.dim, (1.0 if (h >> 31) & 1 else -1.0)
+
+    def _raw(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for gram, tf in self._features(text).items():
+            bucket, sign = self._bucket(gram)
+            vec[bucket] += sign * (1.0 + math.log(tf))
+        return vec
+
+    def fit(self, texts):
+        """Learn bucket IDF from the corpus; rows embedded later are weighted by it."""
+        df = np.zeros(self.dim, dtype=np.float32)
+        for text in texts:
+            df[np.nonzero(self._raw(text))[0]] += 1
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype(np.float32)
+
+    def embed(self, texts) -> np.ndarray:
+        matrix = np.stack([self._raw(t) for t in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+        return _normalize(matrix * self.idf)
+
+    def state(self) -> dict:
+        return {"idf": self.idf.round(5).tolist()}
+
+    def load_state(self, state: dict):
+        if len(state.get("idf", ())) == self.dim:
+            self.idf = np.asarray(state["idf"], dtype=np.float32)
+
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def fit(self, texts):
+        pass
+
+    def embed(self, texts) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return _normalize(self.model.encode(list(texts), batch_size=32, convert_to_numpy=True).astype(np.float32))
+
+    def state(self) -> dict:
+        return {}
+
+    def load_state(self, state: dict):
+        pass
+
+
+def make_embedder():
+    if EMBEDDING_MODEL:
+        try:
+            return SentenceTransformerEmbedder(EMBEDDING_MODEL)
+        except ImportError:
+            print(f"⚠️ sentence-transformers is not installed; using hashed TF-IDF instead of {EMBEDDING_MODEL}")
+    return HashingEmbedder()
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+# --- Documents ---
+def module_documents(db: Session, module_ids=None) -> list:
+    """(kind, ref_id, module_id, title, text) for modules and their steps."""
+    query = db.query(models.Module)
+    if module_ids is not None:
+        query = query.filter(models.Module.id.in_(module_ids))
+    modules = query.all()
+    steps = {}
+    step_query = db.query(models.ModuleStep).order_by(models.ModuleStep.module_id, models.ModuleStep.order_index)
+    if module_ids is not None:
+        step_query = step_query.filter(models.ModuleStep.module_id.in_(module_ids))
+    for step in step_query:
+        steps.setdefault(step.module_id, []).append(step)
+
+    docs = []
+    for module in modules:
+        module_steps = steps.get(module.id, [])
+        # Step titles read like a table of contents, which is most of what "related" means
+        docs.append(("module", module.id, module.id, module.title, _join(
+            module.title, module.description, module.objectives, module.applications,
+            *[s.title for s in module_steps],
+        )))
+        docs.extend(("step", s.id, module.id, s.title, _join(s.title, s.content)) for s in module_steps)
+    return docs
+
+
+def resource_documents(db: Session, resource_ids=None) -> list:
+    query = db.query(models.LearningResource)
+    if resource_ids is not None:
+        query = query.filter(models.LearningResource.id.in_(resource_ids))
+    return [
+        ("resource", r.id, None, r.title, _join(r.title, r.description, r.content))
+        for r in query
+    ]
+
+
+# --- Index ---
+class VectorIndex:
+    def __init__(self, directory: str = EMBEDDINGS_DIR):
+        self.directory = directory
+        self.embedder = None
+        self.matrix = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self.items = [] # [kind, ref_id, module_id, title] per row
+        self._kind_codes = np.zeros(0, dtype=np.int8)
+        self._rows = {} # (kind, ref_id) -> row
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.loaded_from_disk = False
+        self.last_query_ms = None
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.directory, "vectors.npy")
+
+    @property
+    def _meta_path(self):
+        return os.path.join(self.directory, "vectors.json")
+
+    def _set(self, matrix, items):
+        self.matrix = matrix
+        self.items = items
+        self._kind_codes = np.array([KINDS.index(i[0]) for i in items], dtype=np.int8)
+        self._rows = {(i[0], i[1]): n for n, i in enumerate(items)}
+
+    # --- persistence ---
+    def load(self) -> bool:
+        """Memory-map the saved index; False if there is none or it was built by another embedder."""
+        self.embedder = self.embedder or make_embedder()
+        if not (os.path.exists(self._vectors_path) and os.path.exists(self._meta_path)):
+            return False
+        with open(self._meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("embedder") != self.embedder.name or meta.get("dim") != self.embedder.dim:
+            return False
+        self.embedder.load_state(meta.get("state", {}))
+        with self._lock:
+            self._set(np.load(self._vectors_path, mmap_mode="r"), [tuple(i) for i in meta["items"]])
+        self.loaded_from_disk = True
+        return True
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with self._save_lock:
+            with self._lock:
+                matrix, items = self.matrix, list(self.items)
+            meta = {
+                "embedder": self.embedder.name, "dim": self.embedder.dim, "saved_at": time.time(),
+                "state": self.embedder.state(), "items": items,
+            }
+            tmp_vectors, tmp_meta = self._vectors_path + ".tmp.npy", self._meta_path + ".tmp"
+            np.save(tmp_vectors, np.ascontiguousarray(matrix, dtype=np.float32))
+            with open(tmp_meta, "w", encoding="utf-8") as f:
+                json.dump(meta, f, separators=(",", ":"))
+            os.replace(tmp_vectors, self._vectors_path)
+            os.replace(tmp_meta, self._meta_path)
+
+    # --- building ---
+    def rebuild(self, db: Session) -> dict:
+        """Refit the embedder and re-embed everything."""
+        self.embedder = self.embedder or make_embedder()
+        docs = module_documents(db) + resource_documents(db)
+        started = time.perf_counter()
+        self.embedder.fit([d[4] for d in docs])
+        matrix = self.embedder.embed([d[4] for d in docs])
+        with self._lock:
+            self._set(matrix, [d[:4] for d in docs])
+        self.save()
+        return self.stats() | {"build_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    def _replace(self, drop, docs):
+        vectors = self.embedder.embed([d[4] for d in docs])
+        with self._lock:
+            keep = [n for n, item in enumerate(self.items) if not drop(item)]
+            matrix = np.concatenate([np.asarray(self.matrix)[keep], vectors]) if keep else vectors
+            self._set(matrix.astype(np.float32), [self.items[n] for n in keep] + [d[:4] for d in docs])
+
+    def update_module(self, db: Session, module_id: int):
+        """Re-embed a module and its steps (or drop them if the module is gone) and persist."""
+        self.embedder = self.embedder or make_embedder()
+        docs = module_documents(db, [module_id])
+        self._replace(lambda item: item[0] in ("module", "step") and item[2] == module_id, docs)
+        self.save()
+
+    def update_resource(self, db: Session, resource_id: int):
+        self.embedder = self.embedder or make_embedder()
+        docs = resource_documents(db, [resource_id])
+        self._replace(lambda item: item[0] == "resource" and item[1] == resource_id, docs)
+        self.save()
+
+    # --- queries ---
+    def _top_k(self, vector: np.ndarray, k: int, kinds, exclude=()) -> list:
+        started = time.perf_counter()
+        with self._lock:
+            matrix, items, codes, rows = self.matrix, self.items, self._kind_codes, self._rows
+        if not len(items):
+            return []
+        scores = np.asarray(matrix) @ vector
+        allowed = np.isin(codes, [KINDS.index(k) for k in kinds if k in KINDS])
+        for key in exclude:
+            row = rows.get(key)
+            if row is not None:
+                allowed[row] = False
+        scores = np.where(allowed, scores, -np.inf)
+        k = min(k, int(allowed.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        self.last_query_ms = round((time.perf_counter() - started) * 1000, 3)
+        return [
+            {"kind": items[n][0], "ref_id": items[n][1], "module_id": items[n][2], "title": items[n][3], "score": float(scores[n])}
+            for n in top if scores[n] > 0
+        ]
+
+    def search(self, text: str, kinds=None, limit: int = 10) -> list:
+        if self.embedder is None or not text.strip():
+            return []
+        vector = self.embedder.embed([text])[0]
+        return self._top_k(vector, max(1, min(limit, MAX_RESULTS)), kinds or KINDS)
+
+    def related_modules(self, module_id: int, limit: int = 5):
+        """Modules closest to this one; None if the module isn't indexed."""
+        with self._lock:
+            row = self._rows.get(("module", module_id))
+            if row is None:
+                return None
+            vector = np.array(self.matrix[row])
+        return self._top_k(vector, max(1, min(limit, MAX_RESULTS)), ("module",), exclude=[("module", module_id)])
+
+    def stats(self) -> dict:
+        counts = Counter(item[0] for item in self.items)
+        return {
+            "embedder": self.embedder.name if self.embedder else None,
+            "dim": int(self.matrix.shape[1]) if self.matrix.ndim == 2 else None,
+            "rows": len(self.items),
+            "bytes": int(self.matrix.nbytes),
+            "memory_mapped": isinstance(self.matrix, np.memmap),
+            "loaded": self.embedder is not None,
+            "last_query_ms": self.last_query_ms,
+        } | {kind: counts.get(kind, 0) for kind in KINDS}
+
+
+vector_index = VectorIndex()
+_ready = False
+_ready_lock = threading.Lock()
+
+
+# --- Entry points for handlers and background tasks (own sessions) ---
+def ensure_vectors():
+    """Load the saved index, or build it from the database if there is none; only the first call does any work."""
+    global _ready
+    if _ready:
+        return
+    with _ready_lock:
+        if _ready:
+            return
+        if not vector_index.load():
+            from ..database import SessionLocal
+            db = SessionLocal()
+            try:
+                stats = vector_index.rebuild(db)
+            finally:
+                db.close()
+            print(f"Built vector index: {stats}")
+        _ready = True
+
+
+def get_index() -> VectorIndex:
+    ensure_vectors()
+    return vector_index
+
+
+def refresh_module(module_id: int):
+    from ..database import SessionLocal
+    db = SessionLocal()
+    try:
+        # An update before the saved index is loaded would overwrite it with just this module
+        get_index().update_module(db, module_id)
+    except Exception as e:
+        print(f"⚠️ Re-embedding module {module_id} failed: {e}")
+    finally:
+        db.close()
+
+
+def refresh_resource(resource_id: int):
+    from ..database import SessionLocal
+    db = SessionLocal()
+    try:
+        get_index().update_resource(db, resource_id)
+    except Exception as e:
+        print(f"⚠️ Re-embedding resource {resource_id} failed: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,31 @@
+"""
+The timestamped transcript format shared by the video pipeline and the DB.
+
+analyze_structure() writes one `[12.34s - 15.67s]: text` line per Whisper
+segment and hands that text to every prompt. parse_transcript() turns it back
+into (start, end, text) rows for transcript_segments, and format_transcript()
+renders stored rows in the original form, so a reprocessed video can skip
+transcription.
+"""
+import re
+
+_LINE = re.compile(r"^\[(\d+(?:\.\d+)?)s\s*-\s*(\d+(?:\.\d+)?)s\]:\s?(.*)$")
+
+
+def format_segment(start: float, end: float, text: str) -> str:
+    return f"[{start:.2f}s - {end:.2f}s]: {text}"
+
+
+def parse_transcript(transcript_text: str) -> list:
+    """(start, end, text) for every timestamped line; untimed text (no segments from Whisper) is skipped."""
+    segments = []
+    for line in (transcript_text or "").splitlines():
+        match = _LINE.match(line.strip())
+        if match and match.group(3).strip():
+            segments.append((float(match.group(1)), float(match.group(2)), match.group(3).strip()))
+    return segments
+
+
+def format_transcript(segments) -> str:
+    """Inverse of parse_transcript for (start, end, text) rows."""
+    return "".join(format_segment(start, end, text) + "\n" for start, end, text in segments)
@@ -9,6 +9,9 @@ from moviepy.video.io.VideoFileClip import VideoFileClip
 from groq import Groq
 import numpy as np
 
+from .transcripts import format_segment
+from ..scheduler import slot
+
 # --- CONFIGURATION ---
 STRUCTURE_MODEL = "llama-3.3-70b-versatile"
 WHISPER_MODEL = "whisper-large-v3"
@@ -114,11 +117,16 @@ class CourseGenerator:
         self.vision_model_name = model_name if model_name else VISION_MODEL_DEFAULT
         print(f"🌩️ Initialized. Structure: {STRUCTURE_MODEL}, Vision: {self.vision_model_name}")
 
+    def _complete(self, **kwargs):
+        """Chat completion under an LLM slot, so queued jobs share the API rate limit."""
+        with slot("llm"):
+            return self.client.chat.completions.create(**kwargs)
+
     def extract_audio(self, video_path):
         """Extracts audio from video and saves as temp mp3."""
         print("   🔊 Extracting audio...")
         audio_path = f"{video_path}.mp3"
-        with VideoFileClip(video_path) as clip:
+        with slot("decode"), VideoFileClip(video_path) as clip:
             clip.audio.write_audiofile(audio_path, logger=None)
         return audio_path
 
@@ -129,7 +137,7 @@ class CourseGenerator:
         print(f"   🎞️  Extracting frames from {start_time}s to {end_time if end_time else 'end'} (Max: {max_frames})...")
         frames_b64 = []
         try:
-            with VideoFileClip(video_path) as clip:
+            with slot("decode"), VideoFileClip(video_path) as clip:
                 duration = clip.duration
                 if end_time is None:
                     end_time = duration
@@ -158,32 +166,33 @@ class CourseGenerator:
                 
         return frames_b64
 
-    def analyze_structure(self, video_file, description=None, hints=None):
-        """Step 1: Get the timestamps via AUDIO TRANSCRIPTION."""
+    def analyze_structure(self, video_file, description=None, hints=None, transcript_text=None):
+        """Step 1: Get the timestamps via AUDIO TRANSCRIPTION (skipped when a stored transcript is passed in)."""
         print("🧠 Analyzing course structure (Audio-Based)...")
         
+        audio_file = None
         try:
-            audio_file = self.extract_audio(video_file)
-            
-            print("   🗣️  Transcribing audio with timestamps...")
-            with open(audio_file, "rb") as file:
-                transcription = self.client.audio.transcriptions.create(
-                    file=(audio_file, file.read()),
-                    model=WHISPER_MODEL,
-                    response_format="verbose_json"
-                )
-            
-            transcript_text = ""
-            if hasattr(transcription, 'segments'):
-                for segment in transcription.segments:
-                    start = segment['start']
-                    end = segment['end']
-                    text = segment['text'].strip()
-                    transcript_text += f"[{start:.2f}s - {end:.2f}s]: {text}\n"
+            if transcript_text:
+                print(f"   ♻️  Reusing stored transcript ({len(transcript_text)} chars), skipping transcription.")
             else:
-                transcript_text = transcription.text
+                audio_file = self.extract_audio(video_file)
+                
+                print("   🗣️  Transcribing audio with timestamps...")
+                with open(audio_file, "rb") as file, slot("llm"):
+                    transcription = self.client.audio.transcriptions.create(
+                        file=(audio_file, file.read()),
+                        model=WHISPER_MODEL,
+                        response_format="verbose_json"
+                    )
+                
+                transcript_text = ""
+                if hasattr(transcription, 'segments'):
+                    for segment in transcription.segments:
+                        transcript_text += format_segment(segment['start'], segment['end'], segment['text'].strip()) + "\n"
+                else:
+                    transcript_text = transcription.text
 
-            print(f"   ✅ Interpretation complete. Transcript length: {len(transcript_text)} chars.")
+                print(f"   ✅ Interpretation complete. Transcript length: {len(transcript_text)} chars.")
 
             user_context = ""
             if description:
@@ -191,7 +200,7 @@ class CourseGenerator:
             if hints:
                 user_context += f"\n\n**USER HINTS FOR MODULES:**\n{hints}\n(Use these hints to guide the topic creation)"
 
-            completion = self.client.chat.completions.create(
+            completion = self._complete(
                 model=STRUCTURE_MODEL,
                 messages=[
                     {"role": "system", "content": DISCOVERY_PROMPT},
@@ -217,7 +226,7 @@ class CourseGenerator:
                     if isinstance(item, dict) and 'topic_name' in item and 'start_time' in item:
                         valid_modules.append(item)
             
-            if os.path.exists(audio_file):
+            if audio_file and os.path.exists(audio_file):
                 os.remove(audio_file)
 
             print(f"   🧹 Post-processing: Merging short segments (under 60s)...")
@@ -314,7 +323,7 @@ class CourseGenerator:
             })
         
         try:
-            completion = self.client.chat.completions.create(
+            completion = self._complete(
                 model=self.vision_model_name,
                 messages=[{"role": "user", "content": content_parts}],
                 temperature=0.7 
@@ -323,7 +332,7 @@ class CourseGenerator:
         except Exception as e:
             if "content" in str(e) and "string" in str(e):
                 try:
-                    completion = self.client.chat.completions.create(
+                    completion = self._complete(
                         model=self.vision_model_name,
                         messages=[{"role": "user", "content": specific_prompt}],
                         temperature=0.7 
@@ -348,7 +357,7 @@ class CourseGenerator:
             return "## Definitions\n- None\n\n## Practical Application\n- None"
 
     def _text_completion(self, system_prompt, user_content):
-        completion = self.client.chat.completions.create(
+        completion = self._complete(
             model=STRUCTURE_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -432,7 +441,7 @@ Example of BAD distractors (too obvious):
                 
                 try:
                     print(f"      Generating quiz for module {idx}: {topic}")
-                    completion = self.client.chat.completions.create(
+                    completion = self._complete(
                         model=STRUCTURE_MODEL,
                         messages=[
                             {"role": "system", "content": "You are an expert quiz generator specializing in creating CHALLENGING assessments. Generate questions that test deep understanding with plausible, closely-related distractors. Avoid obvious incorrect options. Always return a JSON array of question objects."},
@@ -489,7 +498,7 @@ Example of BAD distractors (too obvious):
                 context_str = f"\n\nContext about the video: {description}"
             
             try:
-                completion = self.client.chat.completions.create(
+                completion = self._complete(
                     model=STRUCTURE_MODEL,
                     messages=[
                         {"role": "system", "content": QUIZ_PROMPT},
@@ -0,0 +1,313 @@
+"""
+Reclaims media files and rows that nothing references any more.
+
+Uploads land in static/videos and the pipeline cuts segments into
+static/courses/{module_id}. Neither location is cleaned up when a module is
+deleted or reprocessed, or when an upload is never turned into a module.
+The sweeper reconciles the media store with the database:
+
+  - Files: any file under MEDIA_DIRS that nothing points at, and that is
+    older than SWEEP_GRACE seconds, is orphaned. References are the URL
+    columns (module video, step media, resource image), every static/ path
+    in the free-text columns (step and resource content), and every static/
+    path in the modules' published snapshots and pending drafts (media a
+    draft adds isn't in the live rows until it is published).
+    The grace period covers an upload whose module hasn't been created yet.
+    Directories of modules that are still processing are skipped.
+  - Rows: child rows whose module (or step) no longer exists, left over from
+    deletes that predate crud.module_cascade. They are removed with one
+    set-based DELETE per table.
+
+Files are deleted in batches of SWEEP_BATCH_SIZE with a SWEEP_BATCH_PAUSE
+sleep between batches, so a big cleanup doesn't saturate the volume that is
+serving videos. A dry run reports the same totals without touching anything.
+delete_module also reclaims the module's own media straight away through
+reclaim_module_media().
+"""
+import asyncio
+import gzip
+import os
+import re
+import shutil
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import crud, models
+from .database import SessionLocal
+
+STATIC_DIR = "static"
+MEDIA_DIRS = (os.path.join(STATIC_DIR, "videos"), os.path.join(STATIC_DIR, "courses"))
+SWEEP_INTERVAL = float(os.getenv("STORAGE_SWEEP_INTERVAL", "21600")) # 0 disables the periodic sweep
+SWEEP_GRACE = float(os.getenv("STORAGE_SWEEP_GRACE", "86400"))
+SWEEP_BATCH_SIZE = int(os.getenv("STORAGE_SWEEP_BATCH_SIZE", "50"))
+SWEEP_BATCH_PAUSE = float(os.getenv("STORAGE_SWEEP_BATCH_PAUSE", "0.5"))
+REPORT_PATHS = 100 # file paths listed in a report
+
+# A static/ path inside markdown, HTML or JSON: runs until whitespace, a quote, a bracket or a query string
+_STATIC_REF = re.compile(r"""static/[^\s"'()<>\[\]?#\\]+""")
+
+
+def static_path(url):
+    """Local path (static/...) behind a media URL, or None for external/empty URLs."""
+    if not url:
+        return None
+    i = url.find(STATIC_DIR + "/")
+    if i < 0:
+        return None
+    return os.path.normpath(url[i:].split("?")[0].split("#")[0])
+
+
+def static_paths_in(text) -> set:
+    """Every local path (static/...) linked from free text such as markdown, HTML or JSON."""
+    if not text:
+        return set()
+    return {os.path.normpath(m.rstrip(".,;:")) for m in _STATIC_REF.findall(text)}
+
+
+def _url_paths(db: Session, stmt) -> set:
+    # Columns holding a single URL
+    return {p for p in map(static_path, db.execute(stmt).scalars()) if p}
+
+
+def _text_paths(db: Session, stmt) -> set:
+    # Free-text columns may link any number of files
+    paths = set()
+    for text in db.execute(stmt).scalars():
+        paths |= static_paths_in(text)
+    return paths
+
+
+def published_paths(db: Session, module_id: int = None) -> set:
+    """Paths referenced by the modules' current published snapshots."""
+    s, m = models.ModuleSnapshot, models.Module
+    stmt = select(s.body).join(m, (m.id == s.module_id) & (m.published_version == s.version))
+    if module_id is not None:
+        stmt = stmt.where(s.module_id == module_id)
+    paths = set()
+    for body in db.execute(stmt).scalars():
+        paths |= static_paths_in(gzip.decompress(body).decode("utf-8"))
+    return paths
+
+
+def referenced_paths(db: Session) -> set:
+    step, resource = models.ModuleStep, models.LearningResource
+    paths = _url_paths(db, select(models.Module.video_url))
+    paths |= _url_paths(db, select(step.media_url))
+    paths |= _url_paths(db, select(resource.image_url))
+    paths |= _text_paths(db, select(step.content).where(step.content.like("%static/%")))
+    paths |= _text_paths(db, select(resource.content).where(resource.content.like("%static/%")))
+    paths |= _text_paths(db, select(models.ModuleDraft.body))
+    return paths | published_paths(db)
+
+
+def module_media_paths(db: Session, module_id: int) -> list:
+    step = models.ModuleStep
+    paths = _url_paths(db, select(models.Module.video_url).where(models.Module.id == module_id))
+    paths |= _url_paths(db, select(step.media_url).where(step.module_id == module_id))
+    paths |= _text_paths(db, select(step.content).where(step.module_id == module_id, step.content.like("%static/%")))
+    paths |= _text_paths(db, select(models.ModuleDraft.body).where(models.ModuleDraft.module_id == module_id))
+    return sorted(paths | published_paths(db, module_id))
+
+
+def _course_dir_module(path: str):
+    # static/courses/{id}/... -> id
+    parts = os.path.normpath(path).split(os.sep)
+    if len(parts) > 2 and parts[:2] == [STATIC_DIR, "courses"] and parts[2].isdigit():
+        return int(parts[2])
+    return None
+
+
+def processing_module_ids(db: Session) -> set:
+    return set(db.execute(select(models.Module.id).where(models.Module.is_processing.is_(True))).scalars())
+
+
+def find_orphaned_files(db: Session, grace: float = SWEEP_GRACE) -> list:
+    """(path, bytes) of every unreferenced media file past the grace period."""
+    referenced = referenced_paths(db)
+    processing = processing_module_ids(db)
+    cutoff = time.time() - grace
+    orphans = []
+    for root in MEDIA_DIRS:
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                path = os.path.normpath(os.path.join(dirpath, name))
+                if path in referenced or _course_dir_module(path) in processing:
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if stat.st_mtime <= cutoff:
+                    orphans.append((path, stat.st_size))
+    return sorted(orphans)
+
+
+def _orphan_row_deletes():
+    """(table name, orphan predicate, model) for child rows whose parent module or step is gone."""
+    live_modules = select(models.Module.id)
+    stmts = [
+        (t.__tablename__, t.module_id.notin_(live_modules), t)
+        for t in (models.ModuleStep, *crud.MODULE_CHILD_TABLES)
+    ]
+    stmts.append((
+        models.AssignmentQuestion.__tablename__,
+        models.AssignmentQuestion.step_id.notin_(select(models.ModuleStep.id)),
+        models.AssignmentQuestion,
+    ))
+    return stmts
+
+
+def reconcile_rows(db: Session, dry_run: bool = True) -> dict:
+    """Count (dry run) or delete orphaned child rows; returns rows per table."""
+    counts = {}
+    # Steps go before assignment questions so the questions of orphaned steps are caught in the same pass
+    for table, orphaned, model in _orphan_row_deletes():
+        if dry_run:
+            counts[table] = db.execute(select(func.count()).select_from(model).where(orphaned)).scalar()
+        else:
+            counts[table] = db.query(model).filter(orphaned).delete(synchronize_session=False)
+    if not dry_run:
+        db.commit()
+    return counts
+
+
+def _delete_files(paths, batch_size: int, pause: float):
+    """Delete files in rate-limited batches; returns (deleted, bytes, errors)."""
+    deleted, reclaimed, errors = [], 0, []
+    for i in range(0, len(paths), batch_size):
+        if i:
+            time.sleep(pause)
+        for path, size in paths[i:i + batch_size]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                errors.append(f"{path}: {e}")
+                continue
+            deleted.append(path)
+            reclaimed += size
+    return deleted, reclaimed, errors
+
+
+def _remove_empty_course_dirs(processing):
+    # The pipeline creates its output directory well before the first segment is written
+    root = os.path.join(STATIC_DIR, "courses")
+    if not os.path.isdir(root):
+        return
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path) and not os.listdir(path) and not (name.isdigit() and int(name) in processing):
+            os.rmdir(path)
+
+
+def sweep(db: Session, dry_run: bool = True, batch_size: int = SWEEP_BATCH_SIZE, pause: float = SWEEP_BATCH_PAUSE, grace: float = SWEEP_GRACE) -> dict:
+    started = time.perf_counter()
+    rows = reconcile_rows(db, dry_run=dry_run)
+    orphans = find_orphaned_files(db, grace=grace)
+    processing = processing_module_ids(db)
+    db.commit() # hand the connection back to the pool for the paced deletes
+    report = {
+        "dry_run": dry_run,
+        "orphaned_files": len(orphans),
+        "orphaned_bytes": sum(size for _, size in orphans),
+        "orphaned_rows": rows,
+        "deleted_files": 0,
+        "reclaimed_bytes": 0,
+        "errors": [],
+        "paths": [path for path, _ in orphans[:REPORT_PATHS]],
+    }
+    if not dry_run:
+        deleted, reclaimed, errors = _delete_files(orphans, max(1, batch_size), pause)
+        _remove_empty_course_dirs(processing)
+        report.update(deleted_files=len(deleted), reclaimed_bytes=reclaimed, errors=errors[:REPORT_PATHS])
+    report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+
+def reclaim_module_media(module_id: int, paths):
+    """Background task after delete_module: remove the module's segments and any of its media nothing else uses."""
+    db = SessionLocal()
+    try:
+        still_used = referenced_paths(db)
+    finally:
+        db.close()
+    candidates = []
+    for path in paths:
+        if path not in still_used and os.path.isfile(path):
+            candidates.append((path, os.path.getsize(path)))
+    deleted, reclaimed, errors = _delete_files(candidates, SWEEP_BATCH_SIZE, SWEEP_BATCH_PAUSE)
+    course_dir = os.path.join(STATIC_DIR, "courses", str(module_id))
+    if os.path.isdir(course_dir):
+        for dirpath, _, filenames in os.walk(course_dir):
+            reclaimed += sum(os.path.getsize(os.path.join(dirpath, f)) for f in filenames)
+        shutil.rmtree(course_dir, ignore_errors=True)
+    for error in errors:
+        print(f"⚠️ Could not remove media of module {module_id}: {error}")
+    if reclaimed:
+        print(f"🧹 Reclaimed {reclaimed} bytes of media from module {module_id}")
+    return reclaimed
+
+
+# --- Periodic job ---
+def sweep_now(dry_run: bool = True) -> dict:
+    db = SessionLocal()
+    try:
+        return sweep(db, dry_run=dry_run)
+    finally:
+        db.close()
+
+
+class StorageSweeper:
+    def __init__(self, interval: float = SWEEP_INTERVAL):
+        self.interval = interval
+        self._task = None
+        self._lock = None
+        self.runs = 0
+        self.errors = 0
+        self.reclaimed_bytes = 0
+        self.last_report = None
+
+    async def run_once(self, dry_run: bool = True) -> dict:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            report = await asyncio.to_thread(sweep_now, dry_run)
+        self.runs += 1
+        self.reclaimed_bytes += report["reclaimed_bytes"]
+        self.last_report = report
+        return report
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once(dry_run=False)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Storage sweep failed: {e}")
+
+    def start(self):
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval, "grace": SWEEP_GRACE, "batch_size": SWEEP_BATCH_SIZE,
+            "batch_pause": SWEEP_BATCH_PAUSE, "runs": self.runs, "errors": self.errors,
+            "reclaimed_bytes": self.reclaimed_bytes, "last_report": self.last_report,
+        }
+
+
+sweeper = StorageSweeper()
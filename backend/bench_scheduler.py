@@ -0,0 +1,57 @@
+"""
+Replays a batch upload against the pipeline scheduler with stand-in stages.
+
+One creator queues a batch of low-priority videos, a second creator queues a
+couple of normal ones, and an urgent safety video arrives while the batch is
+running. Each job sleeps through a decode, an llm and an encode stage.
+Prints the order jobs started in, how long the urgent job waited, and the
+scheduler's stats.
+
+    python bench_scheduler.py [batch size]
+"""
+import sys
+import threading
+import time
+
+from app.scheduler import PipelineScheduler
+
+STAGE_SECONDS = {"decode": 0.05, "llm": 0.1, "encode": 0.15}
+
+
+def main():
+    batch = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    scheduler = PipelineScheduler(workers=2, slots={"encode": 1, "decode": 1, "llm": 2})
+    started, done = [], threading.Event()
+    submitted_at = {}
+
+    def job(name, last=False):
+        started.append((name, time.monotonic() - submitted_at[name]))
+        for stage, seconds in STAGE_SECONDS.items():
+            with scheduler.slot(stage):
+                time.sleep(seconds)
+        if last:
+            done.set()
+
+    def submit(name, owner, priority, last=False):
+        submitted_at[name] = time.monotonic()
+        scheduler.submit(job, name, last, priority=priority, owner=owner, label=name)
+
+    for i in range(batch):
+        submit(f"batch-{i}", "alice", "low", last=i == batch - 1)
+    submit("bob-0", "bob", "normal")
+    time.sleep(0.2)
+    submit("bob-1", "bob", "normal")
+    submit("safety", "carol", "urgent")
+
+    done.wait(timeout=60)
+    scheduler.stop()
+    print("start order:", ", ".join(name for name, _ in started))
+    waits = dict(started)
+    print(f"urgent job waited {waits['safety'] * 1000:.0f} ms; last batch job waited {waits[f'batch-{batch - 1}'] * 1000:.0f} ms")
+    stats = scheduler.stats()
+    print("queue waits:", stats["queue_waits"])
+    print("slots:", stats["slots"])
+
+
+if __name__ == "__main__":
+    main()
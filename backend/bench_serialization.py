@@ -0,0 +1,93 @@
+"""
+Measures what serializing a large module costs per request, before and after
+the TypeAdapter/compression changes.
+
+Builds an in-memory Module with many markdown-heavy steps, then times:
+  legacy      - model_validate -> model_dump -> json.dumps (the old FastAPI path)
+  orjson      - model_validate -> model_dump -> orjson.dumps
+  typeadapter - serialization.module_adapter, straight to bytes in pydantic-core
+and reports the body size raw, gzipped at the configured level and, if
+installed, brotli'd.
+
+Usage: python bench_serialization.py [steps] [iterations]
+"""
+import gzip
+import json
+import sys
+import time
+
+from app import compression, models, schemas, serialization
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PARAGRAPH = (
+    "Check the spring's **free length** against the drawing before loading it into the fixture. "
+    "Reject any part outside tolerance and record the batch number in the inspection sheet.\n\n"
+)
+
+
+def build_module(steps: int) -> models.Module:
+    module = models.Module(
+        id=1, title="Compression spring final inspection", description="Benchmark module",
+        video_url="/static/videos/bench.mp4", objectives=PARAGRAPH * 3, applications=PARAGRAPH * 3,
+        is_processing=False, comment_count=0, reply_count=0, version=1,
+    )
+    module.steps = [
+        models.ModuleStep(
+            id=i + 1, module_id=1, order_index=i, title=f"Step {i + 1}", step_type="instruction",
+            content=PARAGRAPH * 6 + "\n".join(f"- item {j}" for j in range(10)),
+        )
+        for i in range(steps)
+    ]
+    return module
+
+
+def bench(name, fn, iterations):
+    fn() # warm-up
+    started = time.process_time()
+    for _ in range(iterations):
+        body = fn()
+    cpu_ms = (time.process_time() - started) * 1000 / iterations
+    print(f"{name:<12} {cpu_ms:8.3f} ms CPU/request   {len(body):>9,} bytes")
+    return body
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    module = build_module(steps)
+    print(f"Module with {steps} steps, {iterations} iterations\n")
+
+    def legacy():
+        data = schemas.Module.model_validate(module).model_dump(mode="json")
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+    body = bench("legacy", legacy, iterations)
+    if orjson is not None:
+        bench("orjson", lambda: orjson.dumps(schemas.Module.model_validate(module).model_dump(mode="json")), iterations)
+    adapter = serialization.module_adapter
+    bench("typeadapter", lambda: adapter.dump_json(adapter.validate_python(module, from_attributes=True)), iterations)
+
+    print(f"\nOn the wire (compression threshold {compression.MIN_SIZE} bytes):")
+    print(f"  raw     {len(body):>9,} bytes")
+    started = time.process_time()
+    gz = gzip.compress(body, compresslevel=compression.GZIP_LEVEL)
+    print(f"  gzip-{compression.GZIP_LEVEL}  {len(gz):>9,} bytes  ({(time.process_time() - started) * 1000:.2f} ms)")
+    if brotli is not None:
+        started = time.process_time()
+        br = brotli.compress(body, quality=compression.BROTLI_QUALITY)
+        print(f"  br-{compression.BROTLI_QUALITY}    {len(br):>9,} bytes  ({(time.process_time() - started) * 1000:.2f} ms)")
+    else:
+        print("  br      (install brotli-asgi to compare)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Measures what an API worker pays at startup: the time to import app.main, the
+time to run its startup hooks, and the resident memory afterwards. It also
+lists which parts of the AI/video stack got loaded along the way.
+
+Every run is a fresh interpreter. "api" imports app.main only, which is what
+uvicorn does. "api+pipeline" also imports the video pipeline, the way the app
+was loaded before its imports were deferred, for comparison.
+
+Usage: python bench_startup.py [runs]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY = ("moviepy", "groq", "PIL", "numpy", "app.services.video_segmentor")
+
+_CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+if sys.argv[1] == "api+pipeline":
+    import app.api.tasks, app.services.video_segmentor
+elapsed = time.perf_counter() - started
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app):
+    startup = time.perf_counter() - started
+rss_kb = 0
+try:
+    with open("/proc/self/status") as f:
+        rss_kb = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+except (OSError, StopIteration):
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"seconds": elapsed, "startup": startup, "rss_mb": rss_kb / 1024,
+                  "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY,)
+
+
+def measure(mode: str, env: dict) -> dict:
+    # Run from a scratch directory so static/, spool/ and vectors/ land there
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD, mode], env=env, capture_output=True, text=True, check=True, cwd=env["BENCH_DIR"],
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    tmp = tempfile.mkdtemp()
+    backend = os.path.dirname(os.path.abspath(__file__))
+    env = {
+        **os.environ, "BENCH_DIR": tmp, "PYTHONPATH": backend,
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        "ANALYTICS_REFRESH_INTERVAL": "0", "STORAGE_SWEEP_INTERVAL": "0",
+    }
+    # The app expects migrated tables; create them up front so the timed runs don't pay for it
+    subprocess.run(
+        [sys.executable, "-c", "import app.models; from app.database import Base, engine; Base.metadata.create_all(engine)"],
+        env=env, check=True, cwd=tmp,
+    )
+    measure("api", env) # warm the bytecode cache
+
+    for mode in ("api", "api+pipeline"):
+        results = [measure(mode, env) for _ in range(runs)]
+        seconds = statistics.median(r["seconds"] for r in results)
+        startup = statistics.median(r["startup"] for r in results)
+        rss = statistics.median(r["rss_mb"] for r in results)
+        print(f"{mode:<13} import {seconds * 1000:6.0f} ms   startup hooks {startup * 1000:5.0f} ms   "
+              f"RSS {rss:6.1f} MB   loaded: {', '.join(results[0]['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Checks that the hot lookup paths are served by indexes, not table scans.
+
+Runs the real crud queries against a throwaway SQLite database, captures the
+SQL they emit and inspects EXPLAIN QUERY PLAN for each one.
+
+Usage: python check_query_plans.py   (exits non-zero on a regression)
+"""
+import os
+import sys
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'plans.db')}"
+
+from sqlalchemy import event
+
+from app import crud, database, models
+from app.pagination import PageParams
+
+# (name, callable, table that must not be scanned)
+CHECKS = [
+    ("get_user_progress", lambda db: crud.get_user_progress(db, 1, 1), "user_progress"),
+    ("get_comments_for_module", lambda db: crud.get_comments_for_module(db, 1, PageParams()), "comments"),
+    ("get_comment_threads", lambda db: db.execute(crud.comment_threads_query(1, PageParams(after=["2026-01-01 00:00:00", 1]))).all(), "comments"),
+    ("module steps (ordered)", lambda db: crud.get_module_with_steps(db, 1), "module_steps"),
+    ("transcript window", lambda db: db.execute(crud.transcript_query(1, 30.0, 60.0)).all(), "transcript_segments"),
+    ("transcript phrase", lambda db: db.execute(crud.transcript_phrase_query(1, "coil")).all(), "transcript_segments"),
+    ("published snapshot", lambda db: db.execute(crud.published_snapshot_query(1)).all(), "module_snapshots"),
+]
+
+
+def capture(db, fn):
+    statements = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(database.engine, "before_cursor_execute", _before)
+    try:
+        fn(db)
+    finally:
+        event.remove(database.engine, "before_cursor_execute", _before)
+    return statements
+
+
+def main():
+    database.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    db.add(models.Module(id=1, title="plan check"))
+    db.commit()
+
+    failures = 0
+    try:
+        for name, fn, table in CHECKS:
+            for statement, parameters in capture(db, fn):
+                if table not in statement:
+                    continue
+                with database.engine.connect() as conn:
+                    plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                details = [row[-1] for row in plan]
+                # AUTOMATIC ... INDEX: SQLite builds a throwaway index over the table on every execution
+                scanned = any(d.startswith(f"SCAN {table}") or "AUTOMATIC" in d for d in details)
+                status = "FAIL" if scanned else "ok"
+                failures += scanned
+                print(f"[{status}] {name}")
+                for d in details:
+                    print(f"       {d}")
+    finally:
+        db.close()
+
+    if failures:
+        print(f"{failures} query plan(s) fell back to a table scan or an automatic index")
+        sys.exit(1)
+    print("All hot paths use indexes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Concurrency check for the step-submission upsert.
+
+For each of several modules, fires a burst of submissions for the same learner
+at once, each on its own async session and in random order, against a
+throwaway SQLite database. Afterwards every module must have exactly one
+progress row, advanced to the highest passed step; nothing may fail with a
+unique-constraint error.
+
+Usage: python check_submit_concurrency.py [submissions per module]   (exits non-zero on failure)
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'concurrency.db')}"
+
+from sqlalchemy import func, select
+
+from app import crud_async, database, models
+
+USER_ID = 1
+MODULES = 20
+
+
+async def submit(module_id: int, step_index: int, passed: bool):
+    async with database.AsyncSessionLocal() as db:
+        await crud_async.update_progress(db, USER_ID, module_id, step_index, passed)
+
+
+async def burst(module_id: int, submissions: int):
+    jobs = [(i % 10, i % 3 != 0) for i in range(submissions)]
+    random.shuffle(jobs)
+    results = await asyncio.gather(*(submit(module_id, i, p) for i, p in jobs), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, Exception)]
+    expected = max(i for i, p in jobs if p) + 1
+
+    async with database.AsyncSessionLocal() as db:
+        count, step_index = (await db.execute(
+            select(func.count(), func.max(models.UserProgress.current_step_index)).where(
+                models.UserProgress.user_id == USER_ID, models.UserProgress.module_id == module_id
+            )
+        )).one()
+    return errors, count, step_index, expected
+
+
+async def run(submissions: int):
+    results = [await burst(module_id, submissions) for module_id in range(1, MODULES + 1)]
+    await database.async_engine.dispose()
+    return results
+
+
+def main():
+    submissions = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    database.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    db.add(models.User(id=USER_ID, employee_code="CONCURRENCY"))
+    db.add_all([models.Module(id=i, title=f"concurrency check {i}") for i in range(1, MODULES + 1)])
+    db.commit()
+    db.close()
+
+    failures = 0
+    for module_id, (errors, count, step_index, expected) in enumerate(asyncio.run(run(submissions)), start=1):
+        ok = not errors and count == 1 and step_index == expected
+        failures += not ok
+        if not ok:
+            print(f"[FAIL] module {module_id}: {len(errors)} error(s), {count} row(s), current_step_index={step_index} (expected {expected})")
+            for e in errors[:3]:
+                print(f"       {e!r}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: {MODULES} x {submissions} concurrent submissions, one monotonic progress row each")
+
+
+if __name__ == "__main__":
+    main()
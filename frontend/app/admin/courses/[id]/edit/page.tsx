@@ -11,9 +11,12 @@ interface Module {
     video_url: string;
     objectives: string;
     applications: string;
-    quiz_data: string;
     is_processing: boolean;
+    version: number;
+    published_version: number | null;
+    has_draft: boolean;
     steps: ModuleStep[];
+    quiz: QuizQuestion[];
 }
 
 interface ModuleStep {
@@ -25,12 +28,14 @@ interface ModuleStep {
 }
 
 interface QuizQuestion {
+    id?: number;
     question: string;
     type?: 'mcq' | 'fill' | 'numerical';
     options?: string[];
     correct_answer: string;
     tolerance?: number;
     explanation: string;
+    module_index?: number;
 }
 
 export default function EditCoursePage({ params }: { params: { id: string } }) {
@@ -54,7 +59,8 @@ export default function EditCoursePage({ params }: { params: { id: string } }) {
 
     const fetchModule = async () => {
         try {
-            const res = await fetch(`http://localhost:8000/api/v1/modules/${params.id}`, {
+            // Learners get the published snapshot; editing works on the current draft
+            const res = await fetch(`http://localhost:8000/api/v1/modules/${params.id}/draft`, {
                 headers: { Authorization: `Bearer ${token}` }
             });
             if (res.ok) {
@@ -65,15 +71,8 @@ export default function EditCoursePage({ params }: { params: { id: string } }) {
                 setObjectives(data.objectives || '');
                 setApplications(data.applications || '');
                 setSteps(data.steps || []);
-
-                if (data.quiz_data) {
-                    try {
-                        const quizParsed = JSON.parse(data.quiz_data);
-                        setQuiz(Array.isArray(quizParsed) ? quizParsed : quizParsed.questions || []);
-                    } catch {
-                        setQuiz([]);
-                    }
-                }
+                // The draft view carries the quiz with its answers (admins only)
+                setQuiz(data.quiz || []);
             }
         } catch (error) {
             console.error('Error fetching module:', error);
@@ -82,7 +81,7 @@ export default function EditCoursePage({ params }: { params: { id: string } }) {
         }
     };
 
-    const handleSave = async () => {
+    const handleSave = async (publish: boolean) => {
         setSaving(true);
         try {
             const payload = {
@@ -91,8 +90,9 @@ export default function EditCoursePage({ params }: { params: { id: string } }) {
                 video_url: module?.video_url || '',
                 objectives,
                 applications,
-                quiz_data: JSON.stringify(quiz),
+                quiz,
                 steps: steps.map((s, idx) => ({
+                    id: s.id,
                     title: s.title,
                     content: s.content,
                     media_url: s.media_url,
@@ -110,8 +110,15 @@ export default function EditCoursePage({ params }: { params: { id: string } }) {
                 body: JSON.stringify(payload)
             });
 
-            if (res.ok) {
-                alert('Course saved successfully!');
+            if (res.ok && publish) {
+                const pubRes = await fetch(`http://localhost:8000/api/v1/modules/${params.id}/publish`, {
+                    method: 'POST',
+                    headers: { Authorization: `Bearer ${token}` }
+                });
+                alert(pubRes.ok ? 'Course saved and published!' : 'Course saved, but publishing failed.');
+                router.push('/admin');
+            } else if (res.ok) {
+                alert('Course saved as draft. Learners will see it once it is published.');
                 router.push('/admin');
             } else {
                 alert('Failed to save course.');
@@ -497,12 +504,20 @@ export default function EditCoursePage({ params }: { params: { id: string } }) {
                             Cancel
                         </button>
                         <button
-                            onClick={handleSave}
+                            onClick={() => handleSave(false)}
+                            disabled={saving}
+                            className="bg-white border border-blue-600 text-blue-600 hover:bg-blue-50 px-8 py-3 rounded-xl font-bold flex items-center gap-2 disabled:opacity-50"
+                        >
+                            <Save size={20} />
+                            Save Draft
+                        </button>
+                        <button
+                            onClick={() => handleSave(true)}
                             disabled={saving}
                             className="bg-blue-600 hover:bg-blue-700 text-white px-8 py-3 rounded-xl font-bold shadow-lg flex items-center gap-2 disabled:opacity-50"
                         >
                             {saving ? <Loader className="animate-spin" size={20} /> : <Save size={20} />}
-                            {saving ? 'Saving...' : 'Save Course'}
+                            {saving ? 'Saving...' : 'Save & Publish'}
                         </button>
                     </div>
                 </div>
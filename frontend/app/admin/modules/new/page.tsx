@@ -11,6 +11,7 @@ export default function CreateCourse() {
     const [title, setTitle] = useState("");
     const [description, setDescription] = useState("");
     const [videoUrl, setVideoUrl] = useState("");
+    const [priority, setPriority] = useState("normal");
     const [uploading, setUploading] = useState(false);
     const [steps, setSteps] = useState<any[]>([]);
 
@@ -76,6 +77,7 @@ export default function CreateCourse() {
                 title,
                 description,
                 video_url: videoUrl,
+                priority,
                 steps: steps
             };
 
@@ -174,6 +176,21 @@ export default function CreateCourse() {
                                         <span className="truncate">Selected: {videoUrl}</span>
                                     </div>
                                 )}
+                                {videoUrl && (
+                                    <div>
+                                        <label className="block text-xs font-bold text-slate-500 uppercase mb-1">Processing Priority</label>
+                                        <select
+                                            value={priority}
+                                            onChange={(e) => setPriority(e.target.value)}
+                                            className="w-full bg-white border border-slate-200 rounded-lg p-2 text-sm outline-none focus:border-blue-500 text-black"
+                                        >
+                                            <option value="urgent">Urgent (safety content)</option>
+                                            <option value="high">High</option>
+                                            <option value="normal">Normal</option>
+                                            <option value="low">Low (batch uploads)</option>
+                                        </select>
+                                    </div>
+                                )}
                             </div>
                         </div>
                     </div>
@@ -2,6 +2,7 @@
 
 import React, { useEffect, useState } from 'react';
 import { useAuth } from '@/context/AuthContext';
+import { fetchAllPages } from '@/lib/pagination';
 import { Users, BookOpen, Activity, Plus, ArrowRight } from 'lucide-react';
 import Link from 'next/link';
 
@@ -125,17 +126,23 @@ export default function AdminDashboard() {
 function CoursesList() {
     const { token } = useAuth();
     const [courses, setCourses] = useState<any[]>([]);
+    const [stats, setStats] = useState<{ [moduleId: number]: any }>({});
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
         const fetchCourses = async () => {
             try {
-                const res = await fetch('http://localhost:8000/api/v1/modules', {
-                    headers: { Authorization: `Bearer ${token}` }
-                });
-                if (res.ok) {
-                    const data = await res.json();
-                    setCourses(data);
+                const [modules, statsRes] = await Promise.all([
+                    fetchAllPages('http://localhost:8000/api/v1/modules', token),
+                    // Pre-aggregated rollups: cost doesn't grow with headcount
+                    fetch('http://localhost:8000/api/v1/admin/analytics/modules', {
+                        headers: { Authorization: `Bearer ${token}` }
+                    })
+                ]);
+                setCourses(modules);
+                if (statsRes.ok) {
+                    const rows = await statsRes.json();
+                    setStats(Object.fromEntries(rows.map((r: any) => [r.module_id, r])));
                 }
             } catch (error) {
                 console.error('Error fetching courses:', error);
@@ -172,7 +179,13 @@ function CoursesList() {
                                         ⏳ Processing...
                                     </span>
                                 )}
-                                <span className="text-slate-400 font-medium">{course.steps?.length || 0} modules</span>
+                                <span className="text-slate-400 font-medium">{course.step_count || 0} modules</span>
+                                {stats[course.id] && (
+                                    <span className="text-slate-400 font-medium">
+                                        {stats[course.id].completed}/{stats[course.id].assigned} completed
+                                        {stats[course.id].avg_score !== null && ` · avg score ${stats[course.id].avg_score}%`}
+                                    </span>
+                                )}
                             </div>
                         </div>
                         <Link
@@ -2,6 +2,7 @@
 
 import React, { useEffect, useState } from 'react';
 import { useAuth } from '@/context/AuthContext';
+import { fetchAllPages } from '@/lib/pagination';
 import Link from 'next/link';
 import { User, Plus, Search, Shield, Trash2, BookOpen, X, Check } from 'lucide-react';
 
@@ -40,13 +41,7 @@ export default function UserManagement() {
             // For MVP, we might need to add this endpoint or mock it if not available
             // Let's assume GET /api/v1/users exists for admins
             const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api/v1';
-            const res = await fetch(`${apiUrl}/users`, {
-                headers: { Authorization: `Bearer ${token}` }
-            });
-            if (res.ok) {
-                const data = await res.json();
-                setUsers(data);
-            }
+            setUsers(await fetchAllPages(`${apiUrl}/users`, token));
         } catch (error) {
             console.error("Failed to fetch users", error);
         } finally {
@@ -57,13 +52,7 @@ export default function UserManagement() {
     const fetchModules = async () => {
         try {
             const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api/v1';
-            const res = await fetch(`${apiUrl}/modules`, {
-                headers: { Authorization: `Bearer ${token}` }
-            });
-            if (res.ok) {
-                const data = await res.json();
-                setModules(data);
-            }
+            setModules(await fetchAllPages(`${apiUrl}/modules`, token));
         } catch (error) {
             console.error("Failed to fetch modules", error);
         }
@@ -5,6 +5,7 @@ import ResourceCard from '@/components/ResourceCard';
 import { useRouter } from 'next/navigation';
 import { X } from 'lucide-react';
 import { useAuth } from '@/context/AuthContext';
+import { fetchAllPages } from '@/lib/pagination';
 
 // Helper to get YouTube thumbnail
 const getYouTubeThumbnail = (url: string) => {
@@ -28,8 +29,9 @@ export default function LearningPage() {
 
             try {
                 // Fetch Modules (real training modules)
-                const modulesRes = await fetch('http://localhost:8000/api/v1/modules', {
-                    headers: { Authorization: `Bearer ${token}` }
+                const modules = await fetchAllPages('http://localhost:8000/api/v1/modules', token).catch((error) => {
+                    console.error("Failed to fetch modules", error);
+                    return [];
                 });
 
                 // Fetch other resources (articles, links) if endpoint exists
@@ -38,19 +40,16 @@ export default function LearningPage() {
 
                 let combinedResources: any[] = [];
 
-                if (modulesRes.ok) {
-                    const modules = await modulesRes.json();
-                    const moduleResources = modules.map((m: any) => ({
-                        id: m.id,
-                        title: m.title,
-                        description: m.description,
-                        resource_type: 'video', // Modules are primarily video/interactive
-                        content: m.video_url, // For linking
-                        image_url: getYouTubeThumbnail(m.video_url) || "https://placehold.co/600x400/2563eb/FFF?text=Module",
-                        isModule: true
-                    }));
-                    combinedResources = [...combinedResources, ...moduleResources];
-                }
+                const moduleResources = modules.map((m: any) => ({
+                    id: m.id,
+                    title: m.title,
+                    description: m.description,
+                    resource_type: 'video', // Modules are primarily video/interactive
+                    content: m.video_url, // For linking
+                    image_url: getYouTubeThumbnail(m.video_url) || "https://placehold.co/600x400/2563eb/FFF?text=Module",
+                    isModule: true
+                }));
+                combinedResources = [...combinedResources, ...moduleResources];
 
                 // Append static resources (or fetch from /api/v1/resources if implemented)
                 const staticResources = [
@@ -15,12 +15,10 @@ interface ModuleStep {
 }
 
 interface QuizQuestion {
+    id: number;
     question: string;
     type?: 'mcq' | 'fill' | 'numerical';
     options?: string[];
-    correct_answer: string;
-    tolerance?: number;
-    explanation: string;
     module_index?: number;
 }
 
@@ -59,11 +57,13 @@ export default function ModulePage() {
                         return shuffled;
                     };
 
-                    // Parse quiz
-                    if (data.quiz_data) {
+                    // Load quiz (questions only; grading happens on the server)
+                    const quizRes = await fetch(`http://localhost:8000/api/v1/modules/${params.id}/quiz`, {
+                        headers: { Authorization: `Bearer ${token}` }
+                    });
+                    if (quizRes.ok) {
                         try {
-                            const parsed = JSON.parse(data.quiz_data);
-                            let questions = Array.isArray(parsed) ? parsed : [];
+                            let questions: QuizQuestion[] = await quizRes.json();
 
                             // Randomize questions
                             questions = shuffleArray(questions);
@@ -131,50 +131,38 @@ export default function ModulePage() {
         }
     }, [timerActive, timeRemaining, quizResults]);
 
-    const handleQuizSubmit = () => {
+    const handleQuizSubmit = async () => {
         const results: { [key: number]: boolean } = {};
         const scores: { [key: number]: number } = {};
 
-        quiz.forEach((q, idx) => {
-            const userAnswer = quizAnswers[idx];
-            const correctAnswer = q.correct_answer;
-
-            if (q.type === 'numerical' && q.tolerance !== undefined) {
-                // Numerical question with tolerance
-                const userNum = parseFloat(userAnswer);
-                const correctNum = parseFloat(correctAnswer);
-                const tolerance = q.tolerance || 0;
-
-                if (isNaN(userNum)) {
-                    results[idx] = false;
-                    scores[idx] = 0;
-                } else {
-                    const difference = Math.abs(userNum - correctNum);
-                    if (difference > tolerance) {
-                        // Outside acceptable range
-                        results[idx] = false;
-                        scores[idx] = 0;
-                    } else if (difference === 0) {
-                        // Exact answer
-                        results[idx] = true;
-                        scores[idx] = 1;
-                    } else {
-                        // Partial credit based on how close
-                        results[idx] = true; // Technically correct (within tolerance)
-                        const partialScore = 1 - (difference / tolerance) * 0.5; // 50-100% based on distance
-                        scores[idx] = Math.max(0.5, partialScore);
-                    }
-                }
-            } else if (q.type === 'mcq') {
-                // MCQ - exact match
-                results[idx] = userAnswer === correctAnswer;
-                scores[idx] = results[idx] ? 1 : 0;
-            } else {
-                // Fill-in-the-blank - case-insensitive match
-                results[idx] = userAnswer?.trim().toLowerCase() === correctAnswer?.trim().toLowerCase();
-                scores[idx] = results[idx] ? 1 : 0;
+        try {
+            const res = await fetch(`http://localhost:8000/api/v1/modules/${params.id}/quiz/submit`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    Authorization: `Bearer ${token}`
+                },
+                body: JSON.stringify({
+                    answers: quiz
+                        .map((q, idx) => ({ question_id: q.id, value: quizAnswers[idx] }))
+                        .filter((a) => a.value !== undefined)
+                })
+            });
+            if (!res.ok) {
+                console.error("Failed to submit quiz");
+                return;
             }
-        });
+            const graded = await res.json();
+            const byId: { [id: number]: { correct: boolean; score: number } } = {};
+            graded.results.forEach((r: any) => { byId[r.question_id] = r; });
+            quiz.forEach((q, idx) => {
+                results[idx] = byId[q.id]?.correct ?? false;
+                scores[idx] = byId[q.id]?.score ?? 0;
+            });
+        } catch (err) {
+            console.error("Error submitting quiz:", err);
+            return;
+        }
 
         setQuizResults(results);
         setQuizScores(scores);
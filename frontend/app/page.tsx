@@ -14,7 +14,7 @@ const MachineExplorer = dynamic(() => import('@/components/MachineExplorer'), {
 
 export default function Dashboard() {
   const { theme, toggleTheme } = useTheme();
-  const { user } = useAuth();
+  const { user, token } = useAuth();
 
   // State
   const [role, setRole] = useState("CNC Operator");
@@ -25,23 +25,35 @@ export default function Dashboard() {
     // If real user exists, use their role info if available
     // Mock logic for demo purposes if backend isn't full role-based yet
     if (user?.role_id === 1) setRole("Admin");
+  }, [user]);
 
-    // Map real user progress to modules
-    if (user?.progress && user.progress.length > 0) {
-      const realModules = user.progress
-        .filter((p: any) => p.module != null) // Filter out deleted modules
-        .map((p: any) => ({
-          id: p.module.id,
-          title: p.module.title,
-          status: p.status,
-          progress: p.status === "Completed" ? 100 : (p.status === "In Progress" ? (p.current_step_index * 10) : 0),
+  useEffect(() => {
+    // Map assignment summaries to module cards
+    const fetchDashboard = async () => {
+      if (!token) return;
+      try {
+        const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:4800/api/v1';
+        const res = await fetch(`${apiUrl}/dashboard`, {
+          headers: { Authorization: `Bearer ${token}` }
+        });
+        if (!res.ok) {
+          setModules([]);
+          return;
+        }
+        const { items: assignments } = await res.json();
+        setModules(assignments.map((a: any) => ({
+          id: a.module_id,
+          title: a.title,
+          status: a.status,
+          progress: a.status === "Completed" ? 100 : (a.total_steps > 0 ? Math.min(100, Math.round((a.current_step_index / a.total_steps) * 100)) : 0),
           duration: "10 min" // Placeholder as duration is not yet in DB
-        }));
-      setModules(realModules);
-    } else {
-      setModules([]);
-    }
-  }, [user]);
+        })));
+      } catch (error) {
+        console.error("Failed to fetch dashboard", error);
+      }
+    };
+    fetchDashboard();
+  }, [token]);
 
   // Color mapping for modules to match the reference image
   const cardColors = [
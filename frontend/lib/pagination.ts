@@ -0,0 +1,22 @@
+// List endpoints return keyset pages: { items, next_cursor }. Callers that need
+// the whole list (catalog, admin pickers) follow next_cursor until it runs out.
+const PAGE_SIZE = 200; // the API's maximum page size
+
+export async function fetchAllPages<T = any>(url: string, token: string | null): Promise<T[]> {
+    const items: T[] = [];
+    let cursor: string | null = null;
+    do {
+        const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+        if (cursor) params.set('cursor', cursor);
+        const res = await fetch(`${url}${url.includes('?') ? '&' : '?'}${params}`, {
+            headers: { Authorization: `Bearer ${token}` }
+        });
+        if (!res.ok) {
+            throw new Error(`GET ${url} failed with ${res.status}`);
+        }
+        const page = await res.json();
+        items.push(...page.items);
+        cursor = page.next_cursor;
+    } while (cursor);
+    return items;
+}